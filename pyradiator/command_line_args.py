@@ -1,5 +1,6 @@
 import argparse
 import collections
+import getpass
 import json
 import logging
 import operator
@@ -9,16 +10,30 @@ import sys
 
 import pygame
 
+from pyradiator.dispatcher import DISPATCHER_MODES
+from pyradiator.dispatcher import PROCESS_MODE
+
 
 LOGGER = logging.getLogger(__name__)
 DISPLAY_INFO = None
 DEFAULT_CONFIG_FILE = "~/.config/pyradiator.json"
+HEADLESS_MAX_WINDOW_SIZE = (7680, 4320)
 
 
 def is_quiet_mode():
     return any(x in sys.argv for x in ["-h", "--help", "list", "generate"])
 
 
+def is_headless_mode():
+    return "--headless" in sys.argv
+
+
+def get_max_window_size(display_info):
+    if is_headless_mode():
+        return HEADLESS_MAX_WINDOW_SIZE
+    return (display_info.current_w, display_info.current_h)
+
+
 def get_display_info():
     global DISPLAY_INFO
     if DISPLAY_INFO:
@@ -134,7 +149,16 @@ class StoreSize(argparse.Action):
         setattr(namespace, self.dest, value)
 
 
+class StoreCount(StoreSize):
+    def __call__(self, parser, namespace, value, option_string):
+        if value < 1:
+            raise ValueError("'{}' too small, min: 1".
+                             format(option_string))
+        super(StoreCount, self).__call__(parser, namespace, value, option_string)
+
+
 def get_command_line_arguments(display_info):
+    max_window_width, max_window_height = get_max_window_size(display_info)
     return sorted([
         CommandLineArgument(
             name="window-title",
@@ -154,6 +178,51 @@ def get_command_line_arguments(display_info):
             choices=None,
             const=None,
         ),
+        CommandLineArgument(
+            name="full-display-flip",
+            help="Flip the whole display instead of updating the changed areas only.",
+            default=False,
+            type=None,
+            action="store_true",
+            choices=None,
+            const=None,
+        ),
+        CommandLineArgument(
+            name="headless",
+            help="Render off-screen with SDL's dummy video driver.",
+            default=False,
+            type=None,
+            action="store_true",
+            choices=None,
+            const=None,
+        ),
+        CommandLineArgument(
+            name="frame-export-path",
+            help="Directory or named pipe the rendered frames are written to.",
+            default="",
+            type=str,
+            action=None,
+            choices=None,
+            const=None,
+        ),
+        CommandLineArgument(
+            name="frame-export-format",
+            help="Format of the exported frames.",
+            default="png",
+            type=str,
+            action=None,
+            choices=["png", "raw"],
+            const=None,
+        ),
+        CommandLineArgument(
+            name="frame-export-fps",
+            help="Number of frames exported per second.",
+            default=1.0,
+            type=float,
+            action=None,
+            choices=None,
+            const=None,
+        ),
         CommandLineArgument(
             name="window-width",
             help="Width in pixels of the radiator.",
@@ -161,7 +230,7 @@ def get_command_line_arguments(display_info):
             type=int,
             action=StoreSize,
             choices=None,
-            const=display_info.current_w,
+            const=max_window_width,
         ),
         CommandLineArgument(
             name="window-height",
@@ -170,7 +239,7 @@ def get_command_line_arguments(display_info):
             type=int,
             action=StoreSize,
             choices=None,
-            const=display_info.current_h,
+            const=max_window_height,
         ),
         CommandLineArgument(
             name="margin-size",
@@ -217,6 +286,43 @@ def get_command_line_arguments(display_info):
             choices=COLORS.keys(),
             const=None,
         ),
+        CommandLineArgument(
+            name="schedule-jitter",
+            help="Random shift of every channel update, as a fraction of its update period.",
+            default=0.1,
+            type=float,
+            action=StoreSize,
+            choices=None,
+            const=0.5,
+        ),
+        CommandLineArgument(
+            name="snapshot-path",
+            help="File of the last known channel contents shown at startup, "
+                 "empty string disables it.",
+            default="~/.cache/pyradiator/snapshot.pickle",
+            type=str,
+            action=None,
+            choices=None,
+            const=None,
+        ),
+        CommandLineArgument(
+            name="static-noise-fps",
+            help="Frame rate of the no-signal static noise animation, 0 stops it.",
+            default=25,
+            type=int,
+            action=StoreSize,
+            choices=None,
+            const=60,
+        ),
+        CommandLineArgument(
+            name="static-frames",
+            help="Number of precomputed no-signal static noise frames.",
+            default=2,
+            type=int,
+            action=StoreCount,
+            choices=None,
+            const=32,
+        ),
         CommandLineArgument(
             name="font",
             help="Font of the output-text. "
@@ -281,6 +387,15 @@ def get_command_line_arguments(display_info):
             choices=None,
             const=None,
         ),
+        CommandLineArgument(
+            name="render-cache-size",
+            help="Number of rendered text surfaces kept in the line render cache.",
+            default=512,
+            type=int,
+            action=None,
+            choices=None,
+            const=None,
+        ),
         CommandLineArgument(
             name="number-of-left-rows",
             help="Number of rows on the left side.",
@@ -299,6 +414,36 @@ def get_command_line_arguments(display_info):
             choices=[0, 1, 2, 3, 4],
             const=None,
         ),
+        CommandLineArgument(
+            name="dispatcher-mode",
+            help="Run every content provider in its own process, share one pool of "
+                 "worker processes or threads between all channels, or run all "
+                 "channels in one asyncio event loop.",
+            default=PROCESS_MODE,
+            type=str,
+            action=None,
+            choices=DISPATCHER_MODES,
+            const=None,
+        ),
+        CommandLineArgument(
+            name="provider-timeout",
+            help="Seconds after which a content provider call is cancelled, 0 disables it. "
+                 "A channel can override it with its own 'timeout' property.",
+            default=60,
+            type=int,
+            action=None,
+            choices=None,
+            const=None,
+        ),
+        CommandLineArgument(
+            name="worker-pool-size",
+            help="Number of workers in the shared pool, 0 means the number of CPU cores.",
+            default=0,
+            type=int,
+            action=None,
+            choices=None,
+            const=None,
+        ),
         CommandLineArgument(
             name="config-file",
             help="Configuration file path. "
@@ -350,7 +495,7 @@ def get_command_line_arguments(display_info):
                 "finger": {
                     "content_provider": "ask_finger",
                     "content_provider_args": {
-                        "login_name": os.getlogin()
+                        "login_name": getpass.getuser()
                     },
                     "surface_number": 3,
                     "font_size": None,
@@ -367,6 +512,8 @@ def get_command_line_arguments(display_info):
                     "surface_number": 4,
                     "font_size": None,
                     "update_period": 30,
+                    "min_update_period": 5,
+                    "max_update_period": 120,
                 },
             }),
             type=str,
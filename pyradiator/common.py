@@ -1,41 +1,234 @@
+import collections
 import getpass
+import logging
 import math
+import threading
+import time
 
 import pygame
 import requests
 
 
+LOGGER = logging.getLogger(__name__)
+LINE_RENDER_CACHE = None
+COLOR_PALETTE = {}
+
+
 def get_authenticator():
     user = input("User: ")
     password = getpass.getpass()
     return requests.auth.HTTPBasicAuth(user, password)
 
 
+class FontRegistry(object):
+
+    def __init__(self):
+        self._fonts = {}
+        self._font_paths = {}
+        self._glyph_advances = {}
+        self._lock = threading.Lock()
+
+    def get_font(self, face, size, bold=False, italic=False):
+        font_key = (face, size, bold, italic)
+        with self._lock:
+            if font_key not in self._fonts:
+                self._fonts[font_key] = self._create_font(face, size, bold, italic)
+                LOGGER.debug("Font %s created", font_key)
+            return self._fonts[font_key]
+
+    def get_glyph_advance(self, font, character):
+        glyph_key = (font, character)
+        if glyph_key not in self._glyph_advances:
+            glyph_metrics = font.metrics(character)[0]
+            self._glyph_advances[glyph_key] = (
+                glyph_metrics[4] if glyph_metrics else font.size(character)[0]
+            )
+        return self._glyph_advances[glyph_key]
+
+    def measure_text(self, font, text):
+        width = sum(self.get_glyph_advance(font, x) for x in text)
+        return (width, font.get_height())
+
+    def _create_font(self, face, size, bold, italic):
+        font_path, synthetic_bold, synthetic_italic = self._get_font_path(face, bold, italic)
+        font = pygame.font.Font(font_path, size)
+        font.set_bold(synthetic_bold)
+        font.set_italic(synthetic_italic)
+        return font
+
+    def _get_font_path(self, face, bold, italic):
+        path_key = (face, bold, italic)
+        if path_key not in self._font_paths:
+            if face in pygame.font.get_fonts():
+                font_path = pygame.font.match_font(face, bold, italic)
+                regular_font_path = pygame.font.match_font(face)
+                synthetic_style = font_path == regular_font_path
+                self._font_paths[path_key] = (
+                    font_path,
+                    bold and synthetic_style,
+                    italic and synthetic_style
+                )
+            else:
+                self._font_paths[path_key] = (face, bold, italic)
+        return self._font_paths[path_key]
+
+
+FONT_REGISTRY = FontRegistry()
+
+
 def create_font(config, font_size=None):
-    if config.font in pygame.font.get_fonts():
-        return pygame.font.SysFont(
-            config.font,
-            font_size if font_size else config.font_size,
-            config.font_bold,
-            config.font_italic
-        )
-    else:
-        return pygame.font.Font(
-            config.font,
-            config.font_size
-        )
+    return FONT_REGISTRY.get_font(
+        config.font,
+        font_size if font_size else config.font_size,
+        config.font_bold,
+        config.font_italic
+    )
+
+
+def intern_color(color):
+    color = tuple(color)
+    return COLOR_PALETTE.setdefault(color, color)
 
 
 class ColoredString(object):
 
+    __slots__ = ("text", "color")
+
     def __init__(self, text, color=(255, 255, 255)):
         self.text = text
-        self.color = color
+        self.color = intern_color(color)
+
+    def __reduce__(self):
+        return (self.__class__, (self.text, self.color))
 
     def __str__(self):
         return "Text: {}, Color: {}".format(self.text, self.color)
 
 
+def format_time_delta(seconds):
+    hours, remainder = divmod(int(seconds), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return "{:02}:{:02}:{:02}".format(hours, minutes, seconds)
+
+
+def format_countdown(start_time, duration, now=None):
+    now = time.time() if now is None else now
+    remaining_time = start_time + duration - now
+    eta = "N/A" if remaining_time < 0 else format_time_delta(remaining_time)
+    percent = min(int((now - start_time) * 100 / duration), 100) if duration > 0 else 100
+    return "{:>8}, {:3}%".format(eta, percent)
+
+
+class CountdownString(ColoredString):
+
+    __slots__ = ("start_time", "duration", "width")
+
+    def __init__(self, start_time, duration, color=(255, 255, 255), width=0):
+        self.start_time = start_time
+        self.duration = duration
+        self.width = width
+        super().__init__(self.get_text(), color)
+
+    def __reduce__(self):
+        return (self.__class__, (self.start_time, self.duration, self.color, self.width))
+
+    def get_text(self, now=None):
+        return format_countdown(self.start_time, self.duration, now).ljust(self.width)
+
+    def refresh(self, now=None):
+        text = self.get_text(now)
+        changed = text != self.text
+        self.text = text
+        return changed
+
+
+class Table(object):
+
+    def __init__(self, header, align=None, color=(255, 255, 255)):
+        self.color = color
+        self.header = [self._create_cell(x) for x in header]
+        self.align = align if align else ["c"] * len(header)
+        self.rows = []
+
+    def add_row(self, row):
+        self.rows.append([self._create_cell(x) for x in row])
+
+    def get_lines(self):
+        widths = [max(len(x.text) for x in column) for column in zip(self.header, *self.rows)]
+        border = "+" + "+".join("-" * (x + 2) for x in widths) + "+"
+        lines = [
+            [ColoredString(border, self.color)],
+            self._create_line(self.header, widths, self.align),
+            [ColoredString(border, self.color)],
+        ]
+        lines.extend(self._create_line(x, widths, self.align) for x in self.rows)
+        lines.append([ColoredString(border, self.color)])
+        return lines
+
+    def __str__(self):
+        return "\n".join("".join(x.text for x in line) for line in self.get_lines())
+
+    def _create_cell(self, value):
+        return value if isinstance(value, ColoredString) else ColoredString(str(value), self.color)
+
+    def _create_line(self, cells, widths, align):
+        line = []
+        separator = "| "
+        for cell, width, cell_align in zip(cells, widths, align):
+            padding = width - len(cell.text)
+            left_padding = {"l": 0, "r": padding}.get(
+                cell_align, padding // 2 + (padding % 2 and not len(cell.text) % 2)
+            )
+            line.append(ColoredString(separator + " " * left_padding, self.color))
+            line.append(cell)
+            separator = " " * (padding - left_padding) + " | "
+        line.append(ColoredString(separator[:-1], self.color))
+        return line
+
+
+class LruCache(object):
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._items[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __str__(self):
+        return "Size: {}/{}, Hits: {}, Misses: {}".format(
+            len(self), self.max_size, self.hits, self.misses
+        )
+
+
+def get_line_render_cache(config):
+    global LINE_RENDER_CACHE
+    if LINE_RENDER_CACHE is None:
+        LINE_RENDER_CACHE = LruCache(config.render_cache_size)
+    return LINE_RENDER_CACHE
+
+
 class PrintText(object):
 
     def __init__(self, config, surface, position, font):
@@ -44,27 +237,93 @@ class PrintText(object):
         self.position = position
         self.font = font
         self.text_y_offset = math.ceil(self.font.get_height() * 1.05)
+        self.render_cache = get_line_render_cache(config)
+        self._printed_lines = None
+        self._countdown_lines = None
+        self._dirty_rects = []
+        self._lock = threading.Lock()
+        self.last_render_time = None
 
     def __call__(self, lines_to_print):
         if not lines_to_print:
             return
 
-        self.surface.fill(self.config.sub_surface_color)
-        position_x = self.position[0]
+        start_time = time.time()
+        with self._lock:
+            self._print_lines(lines_to_print)
+            self._countdown_lines = lines_to_print if any(
+                isinstance(x, CountdownString) for line in lines_to_print for x in line
+            ) else None
+        self.last_render_time = time.time() - start_time
+        LOGGER.debug("Line render cache: %s", self.render_cache)
+
+    def has_countdowns(self):
+        return self._countdown_lines is not None
+
+    def refresh(self):
+        now = time.time()
+        with self._lock:
+            if self._countdown_lines is None:
+                return
+            changed = [
+                x.refresh(now) for line in self._countdown_lines for x in line
+                if isinstance(x, CountdownString)
+            ]
+            if any(changed):
+                self._print_lines(self._countdown_lines)
+
+    def present(self, target_surface, whole_surface=False):
+        with self._lock:
+            if whole_surface:
+                self._dirty_rects = [self.surface.get_rect()]
+            dirty_rects, self._dirty_rects = self._dirty_rects, []
+            for dirty_rect in dirty_rects:
+                target_surface.blit(self.surface, dirty_rect, dirty_rect)
+        return dirty_rects
+
+    def _print_lines(self, lines_to_print):
+        dirty_rects = []
+        if self._printed_lines is None:
+            self.surface.fill(self.config.sub_surface_color)
+            dirty_rects.append(self.surface.get_rect())
+            self._printed_lines = []
+        line_keys = []
         position_y = self.position[1]
-        text_surface = self.surface.copy()
-        for line in lines_to_print:
-            for line_part in line:
-                rendered_text = self.font.render(
-                    line_part.text,
-                    int(self.config.font_antialias),
-                    line_part.color
-                )
-                text_surface.blit(rendered_text, (position_x, position_y))
-                position_x += rendered_text.get_width()
+        for row, line in enumerate(lines_to_print):
+            if position_y >= self.surface.get_height():
+                break
+            line_key = tuple((x.text, x.color) for x in line)
+            if row >= len(self._printed_lines) or self._printed_lines[row] != line_key:
+                dirty_rects.append(self._clear_row(position_y))
+                self._print_line(line_key, position_y)
+            line_keys.append(line_key)
+            position_y += self.text_y_offset
+        for _ in range(len(line_keys), len(self._printed_lines)):
+            dirty_rects.append(self._clear_row(position_y))
             position_y += self.text_y_offset
-            position_x = self.position[0]
-        self.surface.blit(text_surface, (0, 0))
+        self._printed_lines = line_keys
+        self._dirty_rects.extend(dirty_rects)
+
+    def _clear_row(self, position_y):
+        row_rect = pygame.Rect(0, position_y, self.surface.get_width(), self.text_y_offset)
+        self.surface.fill(self.config.sub_surface_color, row_rect)
+        return row_rect.clip(self.surface.get_rect())
+
+    def _print_line(self, line_key, position_y):
+        position_x = self.position[0]
+        for text, color in line_key:
+            rendered_text = self._render(text, color)
+            self.surface.blit(rendered_text, (position_x, position_y))
+            position_x += rendered_text.get_width()
+
+    def _render(self, text, color):
+        antialias = int(self.config.font_antialias)
+        cache_key = (text, color, antialias, self.font)
+        rendered_text = self.render_cache.get(cache_key)
+        if rendered_text is None:
+            rendered_text = self.font.render(text, antialias, color)
+            self.render_cache.put(cache_key, rendered_text)
+        return rendered_text
 
 
 def print_loading_screen(config, surface):
@@ -79,7 +338,7 @@ def print_loading_screen(config, surface):
              ColoredString(".", (187, 211, 234)),
              ColoredString(".", (211, 223, 234))]]
     text_font = create_font(config, int(math.ceil(config.window_height * 0.1)))
-    text_size = text_font.size("".join(x.text for x in text[0]))
+    text_size = FONT_REGISTRY.measure_text(text_font, "".join(x.text for x in text[0]))
     text_position = ((config.window_width / 2) - (text_size[0] / 2),
                      (config.window_height / 2) - (text_size[1] / 2))
     PrintText(config, surface, text_position, text_font)(text)
@@ -1,13 +1,15 @@
 import json
 import urllib
 
-import prettytable
 import requests
 
-from pyradiator.common import ColoredString
+from pyradiator.common import Table
 from pyradiator.common import get_authenticator
 
 
+REQUEST_TIMEOUT = 10
+
+
 def get_gerrit_query_url(gerrit_url, project, team):
     address = get_gerrit_changes_address(gerrit_url)
     query = get_gerrit_query(project, team)
@@ -33,27 +35,20 @@ class AskGerritOpenChanges(object):
 
     def __call__(self):
         response = self.get_open_gerrit_changes()
-
-        return [
-            [ColoredString(x)]
-            for x in self.gerrit_response_to_pretty_table(response).get_string().splitlines()
-        ]
+        return self.gerrit_response_to_table(response).get_lines()
 
     def get_open_gerrit_changes(self):
-        json_response = requests.get(self.query_url, auth=self.authenticator, verify=True)
+        json_response = requests.get(self.query_url, auth=self.authenticator, verify=True,
+                                     timeout=REQUEST_TIMEOUT)
         return json.loads(json_response.text[4:])
 
-    def gerrit_response_to_pretty_table(self, response):
+    def gerrit_response_to_table(self, response):
         column_1 = "Created"
         column_2 = "Owner"
         column_3 = "Subject"
-        table = prettytable.PrettyTable([column_1, column_2, column_3])
-        table.align[column_1] = "l"
-        table.align[column_2] = "l"
-        table.align[column_3] = "l"
-        table.sortby = column_1
+        table = Table([column_1, column_2, column_3], ["l", "l", "l"])
 
-        for line in response:
+        for line in sorted(response, key=lambda x: x[column_1.lower()]):
             table.add_row([
                 line[column_1.lower()][:-6],
                 line[column_2.lower()]["_account_id"],
@@ -1,12 +1,15 @@
-import datetime
+import concurrent.futures
 import logging
-import re
+import threading
 import time
 
-import prettytable
 import requests
+import requests.adapters
 
 from pyradiator.common import ColoredString
+from pyradiator.common import CountdownString
+from pyradiator.common import LruCache
+from pyradiator.common import Table
 from pyradiator.common import get_authenticator
 
 
@@ -20,16 +23,109 @@ COLOR_MAP = {
     "SUCCESS": (0, 255, 0),
 }
 JSON_API_URL = "/api/json"
+BULK_QUERY_URL = (
+    JSON_API_URL + "?tree=jobs[name,builds[url,result,building,timestamp,estimatedDuration]{0,2}]"
+)
+REQUEST_TIMEOUT = 10
+MAX_PARALLEL_REQUESTS = 8
+BUILD_INFO_CACHE_SIZE = 256
+JOB_SUMMARY_CACHE_SIZE = 256
+BULK_QUERY_UNSUPPORTED_STATUS_CODES = (400, 404)
 
 
 AUTHENTICATOR = get_authenticator()
 
 
+def create_session():
+    session = requests.Session()
+    session.auth = AUTHENTICATOR
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=MAX_PARALLEL_REQUESTS,
+        pool_maxsize=MAX_PARALLEL_REQUESTS
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class ConditionalJsonCache(object):
+
+    def __init__(self, max_size):
+        self.not_modified = 0
+        self.modified = 0
+        self._responses = LruCache(max_size)
+        self._lock = threading.Lock()
+
+    def get_json(self, url):
+        cached = self._responses.get(url)
+        headers = {}
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        response = SESSION.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 304 and cached is not None:
+            with self._lock:
+                self.not_modified += 1
+            return cached[2]
+        response.raise_for_status()
+        with self._lock:
+            self.modified += 1
+        content = response.json()
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self._responses.put(url, (etag, last_modified, content))
+        return content
+
+    def __str__(self):
+        return "Size: {}/{}, Not modified: {}, Modified: {}".format(
+            len(self._responses), self._responses.max_size, self.not_modified, self.modified
+        )
+
+
+SESSION = create_session()
+BUILD_INFO_CACHE = LruCache(BUILD_INFO_CACHE_SIZE)
+JOB_SUMMARY_CACHE = ConditionalJsonCache(JOB_SUMMARY_CACHE_SIZE)
+BULK_QUERY_UNSUPPORTED_URLS = set()
+JOB_LATENCIES = {}
+
+
+def get_json(url):
+    return SESSION.get(url + JSON_API_URL, timeout=REQUEST_TIMEOUT).json()
+
+
+def get_job_summaries(jenkins_url):
+    return JOB_SUMMARY_CACHE.get_json(jenkins_url.rstrip("/") + BULK_QUERY_URL)["jobs"]
+
+
+def is_bulk_query_unsupported(error):
+    return (
+        isinstance(error, requests.HTTPError) and
+        error.response.status_code in BULK_QUERY_UNSUPPORTED_STATUS_CODES
+    )
+
+
 def get_job_info(jenkins_url, job_name):
     LOGGER.debug("Get status of the job %s", job_name)
     job_summary = get_job_summary(jenkins_url, job_name)
-    last_build_info = get_build_info(job_summary, LAST_BUILD)
-    current_build_info = get_build_info(job_summary, CURRENT_BUILD)
+    return create_job_info(
+        job_summary,
+        get_build_info(job_summary, LAST_BUILD),
+        get_build_info(job_summary, CURRENT_BUILD)
+    )
+
+
+def get_job_info_from_summary(job_summary):
+    return create_job_info(
+        job_summary,
+        job_summary["builds"][LAST_BUILD],
+        job_summary["builds"][CURRENT_BUILD]
+    )
+
+
+def create_job_info(job_summary, last_build_info, current_build_info):
     return (
         get_job_name(job_summary, last_build_info),
         get_job_status(current_build_info),
@@ -38,11 +134,17 @@ def get_job_info(jenkins_url, job_name):
 
 
 def get_job_summary(jenkins_url, job_name):
-    return requests.get(jenkins_url + "job/" + job_name + JSON_API_URL, auth=AUTHENTICATOR).json()
+    return JOB_SUMMARY_CACHE.get_json(jenkins_url + "job/" + job_name + JSON_API_URL)
 
 
 def get_build_info(job_summary, build_number):
-    return requests.get(job_summary["builds"][build_number]["url"] + JSON_API_URL, auth=AUTHENTICATOR).json()
+    build_url = job_summary["builds"][build_number]["url"]
+    build_info = BUILD_INFO_CACHE.get(build_url)
+    if build_info is None:
+        build_info = get_json(build_url)
+        if not build_info["building"]:
+            BUILD_INFO_CACHE.put(build_url, build_info)
+    return build_info
 
 
 def get_job_name(job_summary, last_build_info):
@@ -51,7 +153,7 @@ def get_job_name(job_summary, last_build_info):
 
 
 def get_current_build_info(job_summary):
-    return requests.get(job_summary["builds"][CURRENT_BUILD]["url"] + JSON_API_URL, auth=AUTHENTICATOR).json()
+    return get_json(job_summary["builds"][CURRENT_BUILD]["url"])
 
 
 def get_job_status(build_info):
@@ -59,35 +161,13 @@ def get_job_status(build_info):
         return ColoredString("BUILDING", (255, 255, 255))
     else:
         color = COLOR_MAP.get(build_info["result"], (255, 255, 255))
-        return ColoredString(build_info["result"], color)
+        return ColoredString(str(build_info["result"]), color)
 
 
 def get_job_eta(job):
-    start_time, duration = job["timestamp"], job["estimatedDuration"]
-    eta = get_formatted_eta(start_time, duration)
-    percent = get_formatted_percent(start_time, duration)
     if job["building"]:
-        eta = "{:>8}, {:3}%".format(eta, percent)
-    else:
-        eta = "N/A"
-    return ColoredString(eta, (255, 255, 255))
-
-
-def get_formatted_eta(start_time, duration):
-    now = datetime.datetime.now()
-    eta = datetime.datetime.fromtimestamp((start_time + duration) / 1000) - now
-    return "N/A" if eta.days < 0 else format_time_delta(eta)
-
-
-def format_time_delta(time_delta):
-    hours, remainder = divmod(time_delta.seconds, 3600)
-    minutes, seconds = divmod(remainder, 60)
-    return "{:02}:{:02}:{:02}".format(hours, minutes, seconds)
-
-
-def get_formatted_percent(start_time, duration):
-    percent = (int(time.time()) - start_time / 1000) * 100 / (duration / 1000)
-    return 100 if percent > 100 else percent
+        return CountdownString(job["timestamp"] / 1000, job["estimatedDuration"] / 1000)
+    return ColoredString("N/A", (255, 255, 255))
 
 
 class AskJenkinsJobsStatus(object):
@@ -95,41 +175,64 @@ class AskJenkinsJobsStatus(object):
     COLUMN_1 = "Jenkins Job Name                     "
     COLUMN_2 = " Status "
     COLUMN_3 = "     E.T.A.     "
-    ROW_PATTERN = re.compile(r"(\|\s+)(.*)(\s+\|\s+)(.*)(\s+\|\s+)(.*)(\s+\|)")
 
     def __init__(self, jobs):
         self.jobs = jobs
+        self.bulk_query = jobs.get("bulk_query", True)
 
     def __call__(self):
         LOGGER.debug("{}.__call__ called".format(self.__class__.__name__))
-        table = prettytable.PrettyTable([self.COLUMN_1, self.COLUMN_2, self.COLUMN_3])
-        table.align[self.COLUMN_1] = "l"
+        table = Table([self.COLUMN_1, self.COLUMN_2, self.COLUMN_3], ["l", "c", "c"])
 
         try:
-            job_info_list = [get_job_info(self.jobs["url"], x) for x in self.jobs["job_names"]]
-            for job_info in job_info_list:
-                job_info_columns = [x.text for x in job_info]
-                table.add_row(job_info_columns)
+            for job_info in self.get_job_info_list():
+                table.add_row(job_info)
         except Exception:
             LOGGER.exception("Exception")
             return []
 
-        table_lines = table.get_string().splitlines()
-        LOGGER.debug("Table to draw:\n%s", '\n'.join(table_lines))
-        text = []
-        for line in table_lines[:3]:
-            text.append([ColoredString(line)])
-        for i, line in enumerate(table_lines[3:-1]):
-            hit = self.ROW_PATTERN.match(line)
-            if hit:
-                text.append([
-                    ColoredString(hit.group(1)),
-                    ColoredString(hit.group(2), job_info_list[i][0].color),
-                    ColoredString(hit.group(3)),
-                    ColoredString(hit.group(4), job_info_list[i][1].color),
-                    ColoredString(hit.group(5)),
-                    ColoredString(hit.group(6), job_info_list[i][2].color),
-                    ColoredString(hit.group(7)),
-                ])
-        text.append([ColoredString(table_lines[-1])])
-        return text
+        LOGGER.debug("Table to draw:\n%s", table)
+        return table.get_lines()
+
+    def get_job_info_list(self):
+        job_summaries = self.get_bulk_job_summaries() if self.is_bulk_query_enabled() else {}
+        missing_job_names = [x for x in self.jobs["job_names"] if x not in job_summaries]
+        with concurrent.futures.ThreadPoolExecutor(MAX_PARALLEL_REQUESTS) as executor:
+            job_info_map = dict(zip(
+                missing_job_names,
+                executor.map(self.get_timed_job_info, missing_job_names)
+            ))
+        for job_name, job_summary in job_summaries.items():
+            job_info_map[job_name] = get_job_info_from_summary(job_summary)
+        LOGGER.debug("Build info cache: %s", BUILD_INFO_CACHE)
+        LOGGER.debug("Job summary cache: %s", JOB_SUMMARY_CACHE)
+        return [job_info_map[x] for x in self.jobs["job_names"]]
+
+    def is_bulk_query_enabled(self):
+        return self.bulk_query and self.jobs["url"] not in BULK_QUERY_UNSUPPORTED_URLS
+
+    def get_bulk_job_summaries(self):
+        start_time = time.time()
+        try:
+            job_summaries = get_job_summaries(self.jobs["url"])
+        except (requests.RequestException, ValueError, KeyError) as error:
+            if is_bulk_query_unsupported(error):
+                LOGGER.warning("Bulk query not supported by %s, query jobs one by one: %s",
+                               self.jobs["url"], error)
+                BULK_QUERY_UNSUPPORTED_URLS.add(self.jobs["url"])
+            else:
+                LOGGER.warning("Bulk query of %s failed, query jobs one by one: %s",
+                               self.jobs["url"], error)
+            return {}
+        LOGGER.debug("Status of %d jobs got in %.3f s by bulk query",
+                     len(job_summaries), time.time() - start_time)
+        job_names = set(self.jobs["job_names"])
+        return {x["name"]: x for x in job_summaries if x.get("name") in job_names}
+
+    def get_timed_job_info(self, job_name):
+        start_time = time.time()
+        job_info = get_job_info(self.jobs["url"], job_name)
+        JOB_LATENCIES[(self.jobs["url"], job_name)] = time.time() - start_time
+        LOGGER.debug("Status of the job %s got in %.3f s",
+                     job_name, JOB_LATENCIES[(self.jobs["url"], job_name)])
+        return job_info
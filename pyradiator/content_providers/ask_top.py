@@ -6,6 +6,9 @@ from pyradiator.execute_command import execute_simple_command
 
 class AskTop(object):
 
+    def __init__(self):
+        self.radiator_pid = os.getpid()
+
     def __call__(self):
         return [
             [ColoredString(x)] for x in
@@ -14,6 +17,6 @@ class AskTop(object):
                 "-H",
                 "-b",
                 "-n1",
-                "-p", str(os.getppid())
+                "-p", str(self.radiator_pid)
             ])
         ]
@@ -1,25 +1,487 @@
+import asyncio
+import concurrent.futures
+import functools
+import logging
 import multiprocessing
+import os
+import queue
+import signal
+import threading
 
+from pyradiator.wire_format import STOP_SENTINEL
+from pyradiator.wire_format import TIMEOUT_SENTINEL
+from pyradiator.wire_format import UNCHANGED_SENTINEL
+from pyradiator.wire_format import get_fingerprint
+from pyradiator.wire_format import pack_result
+
+
+LOGGER = logging.getLogger(__name__)
+PROCESS_MODE = "process"
+PROCESS_POOL_MODE = "process-pool"
+THREAD_POOL_MODE = "thread-pool"
+ASYNCIO_MODE = "asyncio"
+DISPATCHER_MODES = [PROCESS_MODE, PROCESS_POOL_MODE, THREAD_POOL_MODE, ASYNCIO_MODE]
+QUEUE_SIZE = 2
+
+
+def is_async_content_provider(function):
+    return (
+        asyncio.iscoroutinefunction(function) or
+        asyncio.iscoroutinefunction(getattr(function, "__call__", None))
+    )
+
+
+def call_content_provider(function, timeout=None):
+    result = function()
+    if asyncio.iscoroutine(result):
+        event_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(event_loop)
+        try:
+            result = event_loop.run_until_complete(asyncio.wait_for(result, timeout))
+        finally:
+            asyncio.set_event_loop(None)
+            event_loop.close()
+    return result
+
+
+def call_content_provider_and_fingerprint(function, timeout=None):
+    result = call_content_provider(function, timeout)
+    return get_fingerprint(result), result
+
+
+def call_content_provider_and_pack_result(function, timeout=None):
+    result = pack_result(call_content_provider(function, timeout))
+    return get_fingerprint(result), result
 
-class Dispatcher(object):
 
-    STOP_SENTINEL = "STOP"
+def call_content_provider_in_process_group(function, timeout=None):
+    os.setpgrp()
+    return call_content_provider_and_pack_result(function, timeout)
+
+
+def kill_process_group(pid):
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def get_worker_pool_size(config):
+    return config.worker_pool_size if config.worker_pool_size else os.cpu_count() or 1
+
+
+def create_worker_pool(config):
+    if config.dispatcher_mode == PROCESS_POOL_MODE:
+        worker_pool = ProcessWorkerPool(get_worker_pool_size(config))
+    elif config.dispatcher_mode == THREAD_POOL_MODE:
+        worker_pool = ExecutorWorkerPool(
+            WorkerThreadPool(get_worker_pool_size(config)),
+            call_content_provider_and_fingerprint
+        )
+    elif config.dispatcher_mode == ASYNCIO_MODE:
+        worker_pool = AsyncioWorkerPool(get_worker_pool_size(config))
+    else:
+        return None
+    LOGGER.debug("Shared %s with %d workers created",
+                 config.dispatcher_mode, get_worker_pool_size(config))
+    return worker_pool
+
+
+def put_timeout_result(output_queue):
+    try:
+        output_queue.put_nowait(TIMEOUT_SENTINEL)
+    except queue.Full:
+        LOGGER.debug("Output queue full, timeout result not reported")
+
+
+class ChangeFilter(object):
 
     def __init__(self):
-        self.input_queue = multiprocessing.Queue()
-        self.output_queue = multiprocessing.Queue()
-        self.__process = multiprocessing.Process(target=self.__worker)
+        self._fingerprint = None
+
+    def __call__(self, fingerprint, result):
+        if fingerprint is not None and fingerprint == self._fingerprint:
+            return UNCHANGED_SENTINEL
+        self._fingerprint = fingerprint
+        return result
+
+    def reset(self):
+        self._fingerprint = None
+
+
+def create_dispatcher(worker_pool, timeout=None):
+    if worker_pool:
+        return PooledDispatcher(worker_pool, timeout)
+    return Dispatcher(timeout)
+
+
+class Dispatcher(object):
+
+    def __init__(self, timeout=None):
+        self.input_queue = multiprocessing.Queue(QUEUE_SIZE)
+        self.output_queue = multiprocessing.Queue(QUEUE_SIZE)
+        self.__busy = multiprocessing.Event()
+        self.__timeout = timeout
+        self.__process = self.__create_process()
 
     def start(self):
         self.__process.start()
 
     def stop(self):
-        self.input_queue.put(self.STOP_SENTINEL)
+        if not self.__kill_busy_process():
+            self.input_queue.put(STOP_SENTINEL)
         self.input_queue.close()
         self.output_queue.close()
         self.__process.join()
 
+    def cancel(self):
+        if self.__kill_busy_process():
+            self.__process = self.__create_process()
+            self.__process.start()
+            put_timeout_result(self.output_queue)
+
+    def queue_depth(self):
+        try:
+            return self.input_queue.qsize()
+        except NotImplementedError:
+            return None
+
+    def __create_process(self):
+        return multiprocessing.Process(target=self.__worker)
+
+    def __kill_busy_process(self):
+        if not self.__busy.is_set():
+            return False
+        os.killpg(self.__process.pid, signal.SIGKILL)
+        self.__process.join()
+        self.__busy.clear()
+        LOGGER.debug("Busy worker process %d killed", self.__process.pid)
+        return True
+
     def __worker(self):
-        for function in iter(self.input_queue.get, self.STOP_SENTINEL):
-            result = function()
-            self.output_queue.put(result)
+        os.setpgrp()
+        change_filter = ChangeFilter()
+        for function in iter(self.input_queue.get, STOP_SENTINEL):
+            self.__busy.set()
+            try:
+                fingerprint, result = call_content_provider_and_pack_result(
+                    function, self.__timeout
+                )
+            except asyncio.TimeoutError:
+                fingerprint, result = None, TIMEOUT_SENTINEL
+            except Exception:
+                LOGGER.exception("Content provider failed")
+                fingerprint, result = get_fingerprint([]), []
+            self.output_queue.put(change_filter(fingerprint, result))
+            self.__busy.clear()
+
+
+class WorkerThreadPool(object):
+
+    def __init__(self, max_workers):
+        self._work_queue = queue.Queue()
+        self._threads = set()
+        self._running_futures = {}
+        self._abandoned_futures = set()
+        self._lock = threading.Lock()
+        for _ in range(max_workers):
+            self._start_worker()
+
+    def submit(self, function, *args):
+        future = concurrent.futures.Future()
+        self._work_queue.put((future, function, args))
+        return future
+
+    def cancel(self, future):
+        if future.cancel():
+            return
+        with self._lock:
+            thread = self._running_futures.get(future)
+            if thread is None or future in self._abandoned_futures:
+                return
+            self._abandoned_futures.add(future)
+            self._threads.discard(thread)
+        LOGGER.warning("Content provider call in a thread cannot be killed, "
+                       "left running in the background")
+        future.set_exception(asyncio.TimeoutError())
+        self._start_worker()
+
+    def shutdown(self):
+        with self._lock:
+            number_of_threads = len(self._threads)
+        for _ in range(number_of_threads):
+            self._work_queue.put(None)
+
+    def _start_worker(self):
+        thread = threading.Thread(target=self._work, daemon=True)
+        with self._lock:
+            self._threads.add(thread)
+        thread.start()
+
+    def _work(self):
+        for future, function, args in iter(self._work_queue.get, None):
+            with self._lock:
+                self._running_futures[future] = threading.current_thread()
+            result, exception = None, None
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = function(*args)
+                except BaseException as error:
+                    exception = error
+            with self._lock:
+                del self._running_futures[future]
+                if future in self._abandoned_futures:
+                    self._abandoned_futures.discard(future)
+                    LOGGER.debug("Abandoned content provider call finished")
+                    return
+            if future.cancelled():
+                continue
+            if exception is None:
+                future.set_result(result)
+            else:
+                future.set_exception(exception)
+
+
+class ExecutorWorkerPool(object):
+
+    def __init__(self, executor, call_function):
+        self._executor = executor
+        self._call_function = call_function
+
+    def submit(self, function, timeout=None):
+        return self._executor.submit(self._call_function, function, timeout)
+
+    def cancel(self, future):
+        self._executor.cancel(future)
+
+    def shutdown(self):
+        self._executor.shutdown()
+
+
+class ProcessWorkerPool(object):
+
+    def __init__(self, max_workers):
+        self._max_workers = max_workers
+        self._executor = concurrent.futures.ProcessPoolExecutor(max_workers)
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def submit(self, function, timeout=None):
+        future = concurrent.futures.Future()
+        with self._lock:
+            self._calls[future] = (function, timeout, None)
+            executor_future = self._submit(future)
+        self._add_done_callback(future, executor_future)
+        return future
+
+    def cancel(self, future):
+        with self._lock:
+            if future not in self._calls:
+                return
+            executor_future = self._calls[future][2]
+        if executor_future.cancel():
+            return
+        with self._lock:
+            if self._calls.pop(future, None) is None:
+                return
+            executor, self._executor = (
+                self._executor, concurrent.futures.ProcessPoolExecutor(self._max_workers)
+            )
+            resubmitted_calls = [(x, self._submit(x)) for x in self._calls]
+        self._kill_executor(executor)
+        LOGGER.warning("Content provider call killed with the worker processes, "
+                       "%d other calls resubmitted", len(resubmitted_calls))
+        future.cancel()
+        for resubmitted_future, executor_future in resubmitted_calls:
+            self._add_done_callback(resubmitted_future, executor_future)
+
+    def shutdown(self):
+        with self._lock:
+            futures = list(self._calls)
+            self._calls.clear()
+        if futures:
+            self._kill_executor(self._executor)
+        else:
+            self._executor.shutdown()
+        for future in futures:
+            future.cancel()
+
+    def _kill_executor(self, executor):
+        for process in list(executor._processes.values()):
+            kill_process_group(process.pid)
+        executor.shutdown(wait=False)
+
+    def _submit(self, future):
+        function, timeout, _ = self._calls[future]
+        executor_future = self._executor.submit(
+            call_content_provider_in_process_group, function, timeout
+        )
+        self._calls[future] = (function, timeout, executor_future)
+        return executor_future
+
+    def _add_done_callback(self, future, executor_future):
+        executor_future.add_done_callback(functools.partial(self._set_result, future))
+
+    def _set_result(self, future, executor_future):
+        with self._lock:
+            call = self._calls.get(future)
+            if call is None or call[2] is not executor_future:
+                return
+            del self._calls[future]
+        if executor_future.cancelled():
+            future.cancel()
+        elif executor_future.exception() is not None:
+            future.set_exception(executor_future.exception())
+        else:
+            future.set_result(executor_future.result())
+
+
+class AsyncioWorkerPool(object):
+
+    def __init__(self, max_workers):
+        self._event_loop = asyncio.new_event_loop()
+        self._executor = WorkerThreadPool(max_workers)
+        self._tasks = set()
+        self._calls = {}
+        self._thread = threading.Thread(target=self._run_event_loop)
+        self._thread.start()
+
+    def submit(self, function, timeout=None):
+        future = concurrent.futures.Future()
+        future.set_running_or_notify_cancel()
+        asyncio.run_coroutine_threadsafe(self._call(function, timeout, future), self._event_loop)
+        return future
+
+    def cancel(self, future):
+        self._event_loop.call_soon_threadsafe(self._cancel_call, future)
+
+    def shutdown(self):
+        asyncio.run_coroutine_threadsafe(self._cancel_tasks(), self._event_loop).result()
+        self._event_loop.call_soon_threadsafe(self._event_loop.stop)
+        self._thread.join()
+        self._event_loop.close()
+        self._executor.shutdown()
+
+    def _run_event_loop(self):
+        asyncio.set_event_loop(self._event_loop)
+        self._event_loop.run_forever()
+
+    async def _call(self, function, timeout, future):
+        task, executor_future = self._create_task(function)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        self._calls[future] = (task, executor_future)
+        try:
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+            if not done:
+                self._stop_call(task, executor_future)
+                await asyncio.wait({task})
+                future.set_exception(asyncio.TimeoutError())
+            elif task.cancelled():
+                future.set_exception(asyncio.CancelledError())
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result((get_fingerprint(task.result()), task.result()))
+        finally:
+            del self._calls[future]
+
+    def _create_task(self, function):
+        if is_async_content_provider(function):
+            return asyncio.ensure_future(function()), None
+        executor_future = self._executor.submit(function)
+        return asyncio.wrap_future(executor_future, loop=self._event_loop), executor_future
+
+    def _cancel_call(self, future):
+        if future in self._calls:
+            self._stop_call(*self._calls[future])
+
+    def _stop_call(self, task, executor_future):
+        if executor_future is None:
+            task.cancel()
+        else:
+            self._executor.cancel(executor_future)
+
+    async def _cancel_tasks(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+class WorkerPoolQueue(object):
+
+    def __init__(self, worker_pool, output_queue, timeout=None):
+        self._worker_pool = worker_pool
+        self._output_queue = output_queue
+        self._timeout = timeout
+        self._futures = set()
+        self._cancelled_futures = set()
+        self._change_filter = ChangeFilter()
+        self._lock = threading.Lock()
+
+    def put(self, function):
+        with self._lock:
+            if len(self._futures) + len(self._cancelled_futures) >= QUEUE_SIZE:
+                raise queue.Full
+            future = self._worker_pool.submit(function, self._timeout)
+            self._futures.add(future)
+        future.add_done_callback(self._put_result)
+
+    put_nowait = put
+
+    def qsize(self):
+        return len(self._futures) + len(self._cancelled_futures)
+
+    def cancel(self):
+        with self._lock:
+            futures, self._futures = self._futures, set()
+            self._cancelled_futures.update(futures)
+            self._change_filter.reset()
+        for future in futures:
+            self._worker_pool.cancel(future)
+        put_timeout_result(self._output_queue)
+
+    def _put_result(self, future):
+        with self._lock:
+            if future in self._cancelled_futures:
+                self._cancelled_futures.discard(future)
+                return
+            if future not in self._futures:
+                return
+            self._futures.discard(future)
+        if future.cancelled():
+            return
+        try:
+            fingerprint, result = future.result()
+        except asyncio.CancelledError:
+            return
+        except asyncio.TimeoutError:
+            fingerprint, result = None, TIMEOUT_SENTINEL
+        except Exception:
+            LOGGER.exception("Content provider failed")
+            fingerprint, result = get_fingerprint([]), []
+        with self._lock:
+            result = self._change_filter(fingerprint, result)
+        self._output_queue.put(result)
+
+
+class PooledDispatcher(object):
+
+    def __init__(self, worker_pool, timeout=None):
+        self.output_queue = queue.Queue(QUEUE_SIZE)
+        self.input_queue = WorkerPoolQueue(worker_pool, self.output_queue, timeout)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def cancel(self):
+        self.input_queue.cancel()
+
+    def queue_depth(self):
+        return self.input_queue.qsize()
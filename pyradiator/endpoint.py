@@ -2,57 +2,216 @@ try:
     import queue
 except ImportError:
     import Queue    # noqa
+import logging
+import random
 import threading
+import time
+
+from pyradiator.wire_format import STOP_SENTINEL
+from pyradiator.wire_format import TIMEOUT_SENTINEL
+from pyradiator.wire_format import UNCHANGED_SENTINEL
+from pyradiator.wire_format import unpack_result
+
+
+LOGGER = logging.getLogger(__name__)
 
 
 class Producer(object):
 
-    def __init__(self, period_in_seconds, input_queue, input_functor):
-        self._period_in_seconds = period_in_seconds
+    def __init__(self, period_in_seconds, input_queue, input_functor,
+                 timeout_in_seconds=None, cancel_functor=None,
+                 start_delay_in_seconds=None, jitter=0,
+                 min_period_in_seconds=None, max_period_in_seconds=None):
+        self._min_period_in_seconds = min_period_in_seconds or period_in_seconds
+        self._max_period_in_seconds = max_period_in_seconds or period_in_seconds
+        self._period_in_seconds = max(
+            self._min_period_in_seconds,
+            min(period_in_seconds, self._max_period_in_seconds)
+        )
+        self._start_delay_in_seconds = start_delay_in_seconds
+        self._jitter = jitter
         self._input_queue = input_queue
         self._input_functor = input_functor
+        self._timeout_in_seconds = timeout_in_seconds
+        self._cancel_functor = cancel_functor
+        self._running = True
         self._event = threading.Event()
+        self._fetch_in_flight = threading.Event()
+        self._schedule_lock = threading.Lock()
+        self._scheduled_time = None
+        self._next_tick_time = None
         self._thread = threading.Thread(target=self._loop)
+        self.last_request_time = None
+        self.last_fetch_latency = None
+        self.skipped_ticks = 0
 
     def start(self):
         self._thread.start()
 
     def stop(self):
+        self._running = False
         self._event.set()
         self._thread.join()
 
+    def get_period(self):
+        return self._period_in_seconds
+
+    def fetch_completed(self, changed=True, timed_out=False):
+        if self._fetch_in_flight.is_set():
+            self.last_fetch_latency = time.time() - self.last_request_time
+        self._fetch_in_flight.clear()
+        self.__adapt_period(changed and not timed_out)
+
     def _loop(self):
-        while not self._event.wait(self._period_in_seconds):
-            self.__put_item_into_the_queue()
+        self.__put_item_into_the_queue()
+        with self._schedule_lock:
+            self._scheduled_time = time.time() + self.__get_start_delay()
+            self._next_tick_time = self.__add_jitter(self._scheduled_time)
+        while self.__wait_for_next_event():
+            if self.__is_fetch_timed_out():
+                self.__cancel_fetch()
+            if time.time() >= self._next_tick_time:
+                with self._schedule_lock:
+                    self._scheduled_time = self.__get_next_scheduled_time(self._scheduled_time)
+                    self._next_tick_time = self.__add_jitter(self._scheduled_time)
+                self.__put_item_into_the_queue()
+
+    def __wait_for_next_event(self):
+        self._event.wait(self.__get_wait_time(self._next_tick_time))
+        self._event.clear()
+        return self._running
+
+    def __adapt_period(self, changed):
+        if changed:
+            period = self._min_period_in_seconds
+        else:
+            period = min(self._period_in_seconds * 2, self._max_period_in_seconds)
+        if period == self._period_in_seconds:
+            return
+        with self._schedule_lock:
+            if self._scheduled_time is not None:
+                self._scheduled_time += period - self._period_in_seconds
+            self._period_in_seconds = period
+            if self._scheduled_time is not None:
+                self._next_tick_time = self.__add_jitter(self._scheduled_time)
+        LOGGER.debug("Update period of %s set to %s seconds",
+                     self._input_functor.__class__.__name__, period)
+        self._event.set()
+
+    def __get_start_delay(self):
+        if self._start_delay_in_seconds is None:
+            return self._period_in_seconds
+        return self._start_delay_in_seconds
+
+    def __get_next_scheduled_time(self, scheduled_time):
+        now = time.time()
+        scheduled_time += self._period_in_seconds
+        while scheduled_time <= now:
+            scheduled_time += self._period_in_seconds
+        return scheduled_time
+
+    def __add_jitter(self, scheduled_time):
+        jitter = random.uniform(-self._jitter, self._jitter)
+        return scheduled_time + jitter * self._period_in_seconds
+
+    def __get_wait_time(self, next_tick_time):
+        wake_up_time = next_tick_time
+        if self._timeout_in_seconds and self._fetch_in_flight.is_set():
+            wake_up_time = min(wake_up_time, self.last_request_time + self._timeout_in_seconds)
+        return max(wake_up_time - time.time(), 0)
+
+    def __is_fetch_timed_out(self):
+        return (
+            self._timeout_in_seconds and
+            self._cancel_functor and
+            self._fetch_in_flight.is_set() and
+            time.time() - self.last_request_time >= self._timeout_in_seconds
+        )
+
+    def __cancel_fetch(self):
+        LOGGER.warning("Fetch of %s timed out after %s seconds, cancel it",
+                       self._input_functor.__class__.__name__, self._timeout_in_seconds)
+        self._cancel_functor()
+        self._fetch_in_flight.clear()
 
     def __put_item_into_the_queue(self):
+        if self._fetch_in_flight.is_set():
+            self.__skip_tick("previous fetch still in flight")
+            return
+        last_request_time, self.last_request_time = self.last_request_time, time.time()
+        self._fetch_in_flight.set()
         try:
-            self._input_queue.put(self._input_functor)
+            self._input_queue.put_nowait(self._input_functor)
         except queue.Full:
-            pass
+            self._fetch_in_flight.clear()
+            self.last_request_time = last_request_time
+            self.__skip_tick("input queue full")
 
+    def __skip_tick(self, reason):
+        self.skipped_ticks += 1
+        LOGGER.debug("Tick of %s skipped, %s, %d skipped so far",
+                     self._input_functor.__class__.__name__, reason, self.skipped_ticks)
 
-class Consumer(object):
 
-    STOP_SENTINEL = "STOP"
+class Consumer(object):
 
-    def __init__(self, output_queue, output_functor):
+    def __init__(self, output_queue, output_functor, notify_functor=None):
         self._output_queue = output_queue
         self._output_functor = output_functor
+        self._notify_functor = notify_functor
         self._thread = threading.Thread(target=self._loop)
         self.no_data_from_the_queue = True
         self.request_update = False
+        self.last_result_time = None
+        self.last_update_time = None
+        self.dropped_results = 0
+        self.timed_out_results = 0
+        self.changed_results = 0
+        self.unchanged_results = 0
 
     def start(self):
         self._thread.start()
 
     def stop(self):
-        self._output_queue.put(self.STOP_SENTINEL)
+        self._output_queue.put(STOP_SENTINEL)
         self._thread.join()
 
     def _loop(self):
-        for result in iter(self._output_queue.get, self.STOP_SENTINEL):
-            self.no_data_from_the_queue = not result
-            if result:
-                self._output_functor(result)
-                self.request_update = True
+        for result in iter(self._output_queue.get, STOP_SENTINEL):
+            result = self._drop_stale_results(result)
+            self.last_result_time = time.time()
+            changed = result != UNCHANGED_SENTINEL
+            timed_out = result == TIMEOUT_SENTINEL
+            if changed:
+                self.changed_results += 1
+                self._handle_changed_result(unpack_result(result))
+            else:
+                self.unchanged_results += 1
+            if not self.no_data_from_the_queue:
+                self.last_update_time = time.time()
+            if self._notify_functor:
+                self._notify_functor(changed, timed_out)
+
+    def _handle_changed_result(self, result):
+        if result == TIMEOUT_SENTINEL:
+            self.timed_out_results += 1
+            result = []
+        self.no_data_from_the_queue = not result
+        if result:
+            self._output_functor(result)
+            self.request_update = True
+
+    def _drop_stale_results(self, result):
+        while True:
+            try:
+                newer_result = self._output_queue.get_nowait()
+            except queue.Empty:
+                return result
+            if newer_result == STOP_SENTINEL:
+                self._output_queue.put(newer_result)
+                return result
+            if newer_result == UNCHANGED_SENTINEL:
+                continue
+            self.dropped_results += 1
+            LOGGER.debug("Stale result dropped, %d dropped so far", self.dropped_results)
+            result = newer_result
@@ -0,0 +1,16 @@
+import pygame
+
+
+CONTENT_UPDATE_EVENT = pygame.USEREVENT
+STATIC_NOISE_EVENT = pygame.USEREVENT + 1
+FRAME_EXPORT_EVENT = pygame.USEREVENT + 2
+CLOCK_EVENT = pygame.USEREVENT + 3
+
+
+def post_content_update_event(channel_name):
+    pygame.event.post(pygame.event.Event(CONTENT_UPDATE_EVENT, channel_name=channel_name))
+
+
+def set_event_timer(event_type, frequency):
+    period_in_milliseconds = int(1000 / frequency) if frequency > 0 else 0
+    pygame.time.set_timer(event_type, period_in_milliseconds)
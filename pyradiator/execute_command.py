@@ -1,29 +1,44 @@
+import logging
 import subprocess
 
 
-def _execute_command(function, *args, **kwargs):
+LOGGER = logging.getLogger(__name__)
+COMMAND_TIMEOUT = 30
+
+
+def _split_output(output):
+    output = output.decode()
+    if output:
+        return output.replace('\t', "        ").splitlines()
+    return []
+
+
+def _execute_command(function, *args, timeout=COMMAND_TIMEOUT):
     try:
-        process = function(*args, **kwargs)
+        process = function(*args)
     except OSError:
         pass
     else:
-        output = process.communicate()[0].decode()
-        if output:
-            return output.replace('\t', "        ").splitlines()
+        try:
+            return _split_output(process.communicate(timeout=timeout)[0])
+        except subprocess.TimeoutExpired:
+            LOGGER.warning("Command %s timed out after %s seconds", args, timeout)
+            process.kill()
+            process.communicate()
     return []
 
 
-def execute_simple_command(command):
+def execute_simple_command(command, timeout=COMMAND_TIMEOUT):
     def _popen_call(command):
         process = subprocess.Popen(command,
                                    stdout=subprocess.PIPE,
                                    stderr=subprocess.PIPE)
         return process
 
-    return _execute_command(_popen_call, command)
+    return _execute_command(_popen_call, command, timeout=timeout)
 
 
-def execute_compound_command(command_1, command_2):
+def execute_compound_command(command_1, command_2, timeout=COMMAND_TIMEOUT):
     def _popen_calls(command_1, command_2):
         process_1 = subprocess.Popen(command_1,
                                      stdout=subprocess.PIPE)
@@ -34,4 +49,4 @@ def execute_compound_command(command_1, command_2):
         process_1.stdout.close()
         return process_2
 
-    return _execute_command(_popen_calls, command_1, command_2)
+    return _execute_command(_popen_calls, command_1, command_2, timeout=timeout)
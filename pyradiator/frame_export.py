@@ -0,0 +1,101 @@
+import errno
+import fcntl
+import logging
+import os
+import stat
+
+import pygame
+
+
+LOGGER = logging.getLogger(__name__)
+FRAME_FILE_NAME = "frame_{:08d}.{}"
+RAW_FORMAT = "raw"
+PNG_FORMAT = "png"
+FRAME_FILE_EXTENSIONS = {
+    RAW_FORMAT: "rgb",
+    PNG_FORMAT: "png",
+}
+
+
+def is_named_pipe(path):
+    try:
+        return stat.S_ISFIFO(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+
+def create_frame_exporter(config, surface):
+    if not config.frame_export_path:
+        return None
+    return FrameExporter(config, surface)
+
+
+class FrameExporter(object):
+
+    def __init__(self, config, surface):
+        self.config = config
+        self.surface = surface
+        self.export_path = os.path.expanduser(config.frame_export_path)
+        self.frame_number = 0
+        self._pipe = None
+        if not is_named_pipe(self.export_path):
+            os.makedirs(self.export_path, exist_ok=True)
+        LOGGER.debug("Export %s frames to %s", config.frame_export_format, self.export_path)
+
+    def export_frame(self):
+        try:
+            if is_named_pipe(self.export_path):
+                if not self._open_pipe():
+                    return
+                self._write_frame_to_pipe()
+            else:
+                self._write_frame_to_file()
+        except BrokenPipeError:
+            LOGGER.warning("Reader of %s went away, frame dropped", self.export_path)
+            self.close()
+        else:
+            self.frame_number += 1
+
+    def close(self):
+        if self._pipe:
+            try:
+                self._pipe.close()
+            except BrokenPipeError:
+                pass
+            self._pipe = None
+
+    def _open_pipe(self):
+        if self._pipe:
+            return True
+        try:
+            pipe_fd = os.open(self.export_path, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError as error:
+            if error.errno not in (errno.ENXIO, errno.EAGAIN):
+                raise
+            LOGGER.debug("No reader on %s, frame dropped", self.export_path)
+            return False
+        fcntl.fcntl(pipe_fd, fcntl.F_SETFL, fcntl.fcntl(pipe_fd, fcntl.F_GETFL) & ~os.O_NONBLOCK)
+        self._pipe = os.fdopen(pipe_fd, "wb")
+        LOGGER.debug("Reader on %s connected", self.export_path)
+        return True
+
+    def _write_frame_to_pipe(self):
+        self._write_frame(self._pipe)
+        self._pipe.flush()
+
+    def _write_frame_to_file(self):
+        frame_file_name = os.path.join(
+            self.export_path,
+            FRAME_FILE_NAME.format(
+                self.frame_number,
+                FRAME_FILE_EXTENSIONS[self.config.frame_export_format]
+            )
+        )
+        with open(frame_file_name, "wb") as frame_file:
+            self._write_frame(frame_file)
+
+    def _write_frame(self, frame_file):
+        if self.config.frame_export_format == RAW_FORMAT:
+            frame_file.write(pygame.image.tostring(self.surface, "RGB"))
+        else:
+            pygame.image.save(self.surface, frame_file, "frame.png")
@@ -0,0 +1,78 @@
+import pygame
+
+from pyradiator.common import FONT_REGISTRY
+from pyradiator.common import create_font
+
+
+HUD_FONT_SIZE = 14
+HUD_MARGIN = 5
+HUD_BACKGROUND_COLOR = (30, 30, 30)
+HUD_TEXT_COLOR = (255, 255, 0)
+HUD_LINE_TEMPLATES = [
+    "Fetch:  {:>9}",
+    "Render: {:>9}",
+    "Queue:  {:>9}",
+    "Age:    {:>9}",
+    "Skipped:{:>9}",
+    "Timeout:{:>9}",
+    "Changed:{:>9}",
+    "Period: {:>9}",
+    "FPS:    {:>9}",
+]
+
+
+def format_value(value, unit_format):
+    return "N/A" if value is None else unit_format.format(value)
+
+
+def get_hud_lines(statistics, fps):
+    values = [
+        format_value(statistics.fetch_latency, "{:.2f} s"),
+        format_value(statistics.render_time, "{:.1f} ms"),
+        format_value(statistics.queue_depth, "{}"),
+        format_value(statistics.last_update_age, "{:.0f} s"),
+        format_value(statistics.skipped_ticks, "{}"),
+        format_value(statistics.timed_out_results, "{}"),
+        "{}/{}".format(
+            statistics.changed_results,
+            statistics.changed_results + statistics.unchanged_results
+        ),
+        format_value(statistics.update_period, "{:.0f} s"),
+        format_value(fps, "{:.1f}"),
+    ]
+    return [x.format(y) for x, y in zip(HUD_LINE_TEMPLATES, values)]
+
+
+class PerformanceHud(object):
+
+    def __init__(self, config):
+        self.config = config
+        self.visible = False
+        self.font = create_font(config, HUD_FONT_SIZE)
+        self.line_height = self.font.get_linesize()
+        self.size = (
+            max(
+                FONT_REGISTRY.measure_text(self.font, x.format("0" * 9))[0]
+                for x in HUD_LINE_TEMPLATES
+            ) + 2 * HUD_MARGIN,
+            len(HUD_LINE_TEMPLATES) * self.line_height + 2 * HUD_MARGIN
+        )
+
+    def toggle(self):
+        self.visible = not self.visible
+
+    def draw(self, channel, fps):
+        surface = channel.surface
+        hud_rect = pygame.Rect((0, 0), self.size)
+        hud_rect.bottomleft = (0, surface.get_height())
+        hud_rect = hud_rect.clip(surface.get_rect())
+        hud_surface = surface.subsurface(hud_rect)
+        hud_surface.fill(HUD_BACKGROUND_COLOR)
+        for i, line in enumerate(get_hud_lines(channel.get_statistics(), fps)):
+            rendered_line = self.font.render(
+                line,
+                int(self.config.font_antialias),
+                HUD_TEXT_COLOR
+            )
+            hud_surface.blit(rendered_line, (HUD_MARGIN, HUD_MARGIN + i * self.line_height))
+        return hud_rect.move(surface.get_abs_offset())
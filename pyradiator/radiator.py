@@ -1,23 +1,38 @@
 import collections
 import contextlib
 import logging
+import os
 
 import pygame
 
 from pyradiator.app_state import ApplicationState
 from pyradiator.command_line_args import get_configuration
+from pyradiator.command_line_args import is_headless_mode
 from pyradiator.command_line_args import is_quiet_mode
 from pyradiator.common import PrintText
 from pyradiator.common import create_font
 from pyradiator.common import print_loading_screen
 from pyradiator.content_providers.content_provider_loader import load_content_provider
+from pyradiator.dispatcher import create_worker_pool
+from pyradiator.events import CLOCK_EVENT
+from pyradiator.events import CONTENT_UPDATE_EVENT
+from pyradiator.events import FRAME_EXPORT_EVENT
+from pyradiator.events import STATIC_NOISE_EVENT
+from pyradiator.events import set_event_timer
+from pyradiator.frame_export import create_frame_exporter
+from pyradiator.hud import PerformanceHud
 from pyradiator.radiator_channel import RadiatorChannel
+from pyradiator.radiator_channel import StaticNoiseAtlas
+from pyradiator.snapshot import create_snapshot_store
 
 
 LOG_LEVEL = logging.ERROR if is_quiet_mode() else logging.DEBUG
 FORMAT = "%(asctime)-15s %(name)s - %(levelname)s - %(message)s"
 logging.basicConfig(format=FORMAT, level=LOG_LEVEL)
 LOGGER = logging.getLogger(__name__)
+EVENT_WAIT_TIMEOUT = 500
+CLOCK_FREQUENCY = 1
+HEADLESS_VIDEO_DRIVER = "dummy"
 
 Show = collections.namedtuple(
     "Show", [
@@ -26,18 +41,33 @@ Show = collections.namedtuple(
         "content_provider_args",
         "surface_number",
         "font_size",
-        "update_period"
+        "update_period",
+        "min_update_period",
+        "max_update_period",
+        "timeout"
     ]
 )
 
 
 def initialize_pygame_modules():
+    if is_headless_mode():
+        os.environ["SDL_VIDEODRIVER"] = HEADLESS_VIDEO_DRIVER
     pygame.display.init()
     LOGGER.debug("Module pygame.display initialized")
     pygame.font.init()
     LOGGER.debug("Module pygame.font initialized")
 
 
+def switch_to_headless_video_driver():
+    if pygame.display.get_driver() == HEADLESS_VIDEO_DRIVER:
+        return
+    pygame.display.quit()
+    os.environ["SDL_VIDEODRIVER"] = HEADLESS_VIDEO_DRIVER
+    pygame.display.init()
+    LOGGER.debug("Module pygame.display re-initialized with the %s driver",
+                 HEADLESS_VIDEO_DRIVER)
+
+
 def disable_mouse_events():
     pygame.event.set_blocked(pygame.MOUSEMOTION)
     pygame.event.set_blocked(pygame.MOUSEBUTTONUP)
@@ -95,36 +125,83 @@ def create_sub_surfaces(config, main_surface):
     ]
 
 
-def loop(application_state, config, subsurfaces, clock, channels):
+def update_display(config, dirty_rects):
+    if config.headless:
+        return
+    if config.full_display_flip:
+        LOGGER.debug("Flip")
+        pygame.display.flip()
+    else:
+        LOGGER.debug("Update %d rectangles", len(dirty_rects))
+        pygame.display.update(dirty_rects)
+
+
+def present_channels(channels):
+    return [x for channel in channels for x in channel.present()]
+
+
+def toggle_hud(hud, channels):
+    hud.toggle()
+    LOGGER.debug("Performance HUD visible: %s", hud.visible)
+    for channel in channels:
+        channel.repaint()
+
+
+def draw_hud(hud, clock, channels):
+    return [hud.draw(channel, clock.get_fps()) for channel in channels]
+
+
+def loop(application_state, config, subsurfaces, clock, channels, frame_exporter):
     LOGGER.debug("Enter main loop")
+    hud = PerformanceHud(config)
     application_state.set_application_state(application_state.MAIN_LOOP)
-    do_flip = False
+    set_event_timer(STATIC_NOISE_EVENT, config.static_noise_fps)
+    set_event_timer(CLOCK_EVENT, CLOCK_FREQUENCY)
+    if frame_exporter:
+        set_event_timer(FRAME_EXPORT_EVENT, config.frame_export_fps)
+    for channel in channels:
+        channel.display_static()
+    update_display(config, present_channels(channels))
     while application_state.running:
-        for event in pygame.event.get():
+        events = [pygame.event.wait(EVENT_WAIT_TIMEOUT)] + pygame.event.get()
+        event_types = set(x.type for x in events)
+        updated_channel_names = set(
+            x.channel_name for x in events if x.type == CONTENT_UPDATE_EVENT
+        )
+        for event in events:
             if event.type == pygame.KEYDOWN and event.key == pygame.K_q:
                 LOGGER.debug("Quit")
                 application_state.stop_main_loop()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_h:
+                toggle_hud(hud, channels)
         for channel in channels:
-            if channel.no_signal():
-                channel.display_static()
-                fps = 25
-                do_flip = True
             if channel.do_update():
                 channel.ack_update()
-                do_flip = True
-                fps = 5
-        if do_flip:
-            LOGGER.debug("Flip")
-            pygame.display.flip()
-            do_flip = False
-        clock.tick(fps)
+            if CLOCK_EVENT in event_types:
+                channel.refresh()
+            if channel.no_signal() and (
+                    STATIC_NOISE_EVENT in event_types or
+                    channel.name in updated_channel_names or
+                    CLOCK_EVENT in event_types and channel.waiting_for_first_result()):
+                channel.display_static()
+        dirty_rects = present_channels(channels)
+        if hud.visible and (dirty_rects or CLOCK_EVENT in event_types):
+            dirty_rects.extend(draw_hud(hud, clock, channels))
+        if dirty_rects:
+            update_display(config, dirty_rects)
+            clock.tick()
+        if FRAME_EXPORT_EVENT in event_types and frame_exporter:
+            frame_exporter.export_frame()
+    set_event_timer(STATIC_NOISE_EVENT, 0)
+    set_event_timer(FRAME_EXPORT_EVENT, 0)
+    set_event_timer(CLOCK_EVENT, 0)
 
 
 class InvalidNumberOfChannels(Exception):
     pass
 
 
-def create_channels(config, subsurfaces):
+def create_channels(config, subsurfaces, worker_pool, snapshot_store):
     if len(config.channels) != len(subsurfaces):
         raise InvalidNumberOfChannels(
             "\nNumber of channels: {}\nNumber of surfaces: {}".format(
@@ -132,12 +209,19 @@ def create_channels(config, subsurfaces):
                 len(subsurfaces)
             )
         )
+    static_noise = StaticNoiseAtlas(config, subsurfaces)
+    shows = get_configured_shows(config)
     return [
-        create_channel(config, subsurfaces, show)
-        for show in get_configured_shows(config)
+        create_channel(config, subsurfaces, static_noise, worker_pool, snapshot_store, show,
+                       get_start_delay(show, i, len(shows)))
+        for i, show in enumerate(shows)
     ]
 
 
+def get_start_delay(show, show_index, number_of_shows):
+    return show.update_period * (show_index + 1) / number_of_shows
+
+
 def get_configured_shows(config):
     return [
         Show(
@@ -146,27 +230,39 @@ def get_configured_shows(config):
             properties["content_provider_args"],
             properties["surface_number"],
             properties["font_size"],
-            properties["update_period"]
+            properties["update_period"],
+            properties.get("min_update_period"),
+            properties.get("max_update_period"),
+            properties.get("timeout", config.provider_timeout) or None
         )
         for name, properties in config.channels.items()
     ]
 
 
-def create_channel(config, subsurfaces, show):
+def create_channel(config, subsurfaces, static_noise, worker_pool, snapshot_store, show,
+                   start_delay=None):
     surface = subsurfaces[show.surface_number]
+    back_buffer = pygame.Surface(surface.get_size())
     LOGGER.debug("Create channel: %s %s", show.name, surface.get_abs_offset())
     return RadiatorChannel(
         config=config,
         name=show.name,
         surface=surface,
+        static_noise=static_noise,
         input_functor=show.content_provider(**show.content_provider_args),
         output_functor=PrintText(
             config=config,
-            surface=surface,
+            surface=back_buffer,
             position=(0, 0),
             font=create_font(config, show.font_size)
         ),
-        update_period=show.update_period
+        update_period=show.update_period,
+        min_update_period=show.min_update_period,
+        max_update_period=show.max_update_period,
+        timeout=show.timeout,
+        start_delay=start_delay,
+        worker_pool=worker_pool,
+        snapshot_store=snapshot_store
     )
 
 
@@ -184,8 +280,10 @@ def main():
     application_state = ApplicationState()
 
     initialize_pygame_modules()
-    disable_mouse_events()
     config = get_configuration()
+    if config.headless:
+        switch_to_headless_video_driver()
+    disable_mouse_events()
 
     clock = pygame.time.Clock()
     main_surface = create_main_surface(config)
@@ -194,7 +292,18 @@ def main():
     print_loading_screen(config, main_surface)
     main_surface.fill(config.main_surface_color)
 
-    channels = create_channels(config, subsurfaces)
+    worker_pool = create_worker_pool(config)
+    snapshot_store = create_snapshot_store(config)
+    channels = create_channels(config, subsurfaces, worker_pool, snapshot_store)
+    frame_exporter = create_frame_exporter(config, main_surface)
 
+    if snapshot_store:
+        snapshot_store.start()
     with turn_on_channels(application_state, channels):
-        loop(application_state, config, subsurfaces, clock, channels)
+        loop(application_state, config, subsurfaces, clock, channels, frame_exporter)
+    if worker_pool:
+        worker_pool.shutdown()
+    if snapshot_store:
+        snapshot_store.stop()
+    if frame_exporter:
+        frame_exporter.close()
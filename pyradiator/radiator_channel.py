@@ -1,62 +1,169 @@
+import collections
+import logging
+import os
 import random
+import time
 
 import pygame
 
 from pyradiator.common import create_font
-from pyradiator.dispatcher import Dispatcher
+from pyradiator.dispatcher import create_dispatcher
 from pyradiator.endpoint import Consumer
 from pyradiator.endpoint import Producer
+from pyradiator.events import post_content_update_event
+from pyradiator.wire_format import unpack_result
 
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+LOGGER = logging.getLogger(__name__)
 RRR = random.randrange
+NOISE_PALETTE_INDEXES = bytes(x & 1 for x in range(256))
+OVERLAYS = {}
+STATIC_NOISE_MARGIN = 60
+
+ChannelStatistics = collections.namedtuple(
+    "ChannelStatistics", [
+        "fetch_latency",
+        "render_time",
+        "queue_depth",
+        "last_update_age",
+        "skipped_ticks",
+        "timed_out_results",
+        "changed_results",
+        "unchanged_results",
+        "update_period"
+    ]
+)
 
 
-def create_static_surface(config, surface):
-    (width, height) = surface.get_size()
-    static_width = width + 60
-    static_height = height + 60
-    static = pygame.Surface((static_width, static_height))
-    colors = (
+def create_static_surface(config, size):
+    static = pygame.Surface(size)
+    if numpy is None:
+        fill_with_noise_from_bytes(config, static)
+    else:
+        fill_with_noise_from_array(config, static)
+    return static
+
+
+def fill_with_noise_from_array(config, static):
+    colors = numpy.array([
         static.map_rgb(config.static_bg_color),
         static.map_rgb(config.static_fg_color)
-    )
-    random_choice = random.choice
-    set_pixel_color_at = static.set_at
-    y_range = range(static_height)
-    for x in range(static_width):
-        for y in y_range:
-            set_pixel_color_at((x, y), random_choice(colors))
-    return static
+    ])
+    color_indexes = numpy.random.randint(0, 2, static.get_size(), dtype=numpy.uint8)
+    pygame.surfarray.blit_array(static, colors.take(color_indexes))
+
+
+def fill_with_noise_from_bytes(config, static):
+    (width, height) = static.get_size()
+    color_indexes = os.urandom(width * height).translate(NOISE_PALETTE_INDEXES)
+    noise = pygame.image.fromstring(color_indexes, (width, height), "P")
+    noise.set_palette_at(0, config.static_bg_color)
+    noise.set_palette_at(1, config.static_fg_color)
+    static.blit(noise, (0, 0))
 
 
-def create_no_signal_overlay(config, channel_name):
-    font = create_font(config, 24)
-    text = "Channel '{}': {}.".format(channel_name, "No signal")
-    no_signal = font.render(text, 1, config.font_fg_color)
+class StaticNoiseAtlas(object):
+
+    def __init__(self, config, surfaces):
+        if config.static_frames < 1:
+            raise ValueError("'static_frames' too small, min: 1")
+        size = (
+            max(x.get_width() for x in surfaces) + STATIC_NOISE_MARGIN,
+            max(x.get_height() for x in surfaces) + STATIC_NOISE_MARGIN
+        )
+        self.frames = [
+            create_static_surface(config, size)
+            for _ in range(config.static_frames)
+        ]
+        self.frame_index = 0
+
+    def blit_window(self, surface):
+        self.frame_index = (self.frame_index + 1) % len(self.frames)
+        frame = self.frames[self.frame_index]
+        (width, height) = surface.get_size()
+        window = (
+            RRR(frame.get_width() - width + 1),
+            RRR(frame.get_height() - height + 1),
+            width,
+            height
+        )
+        surface.blit(frame, (0, 0), window)
+
+
+def render_overlay(config, text, font_size):
+    font = create_font(config, font_size)
+    rendered_text = font.render(text, 1, config.font_fg_color)
     overlay = pygame.Surface(tuple(x + 5 for x in font.size(text)), pygame.SRCALPHA)
     overlay.fill((30, 30, 30, 200))
-    overlay.blit(no_signal, (5, 0))
+    overlay.blit(rendered_text, (5, 0))
     return overlay
 
 
+def create_overlay(config, text, font_size):
+    overlay_key = (text, font_size)
+    if overlay_key not in OVERLAYS:
+        OVERLAYS[overlay_key] = render_overlay(config, text, font_size)
+    return OVERLAYS[overlay_key]
+
+
+def create_no_signal_overlay(config, channel_name, font_size=24):
+    return create_overlay(config, "Channel '{}': {}.".format(channel_name, "No signal"), font_size)
+
+
+def create_loading_overlay(config, channel_name, elapsed_time, font_size=24):
+    text = "Channel '{}': Loading, {} s".format(channel_name, elapsed_time)
+    return render_overlay(config, text, font_size)
+
+
+def create_stale_overlay(config, update_time, font_size=16):
+    update_time = time.strftime("%Y-%m-%d %H:%M", time.localtime(update_time))
+    return create_overlay(config, "Stale, last update: {}".format(update_time), font_size)
+
+
 class RadiatorChannel(object):
-    def __init__(self, config, name, surface, input_functor, output_functor, update_period):
+    def __init__(self, config, name, surface, static_noise, input_functor, output_functor,
+                 update_period, min_update_period=None, max_update_period=None, timeout=None,
+                 start_delay=None, worker_pool=None, snapshot_store=None):
         self.config = config
+        self.name = name
         self.surface = surface
-        self.static = create_static_surface(self.config, self.surface)
+        self.static_noise = static_noise
         self.overlay = create_no_signal_overlay(self.config, name)
-        self.dispatcher = Dispatcher()
+        self.stale_overlay = None
+        self.output_functor = output_functor
+        self.turn_on_time = None
+        self._loading_overlay = (None, None)
+        self.snapshot_store = snapshot_store
+        self._dirty_rects = []
+        self._whole_surface_dirty = False
+        self.dispatcher = create_dispatcher(worker_pool, timeout)
         self.producer = Producer(
             update_period,
             self.dispatcher.input_queue,
-            input_functor
+            input_functor,
+            timeout_in_seconds=timeout,
+            cancel_functor=self.dispatcher.cancel,
+            start_delay_in_seconds=start_delay,
+            jitter=config.schedule_jitter,
+            min_period_in_seconds=min_update_period,
+            max_period_in_seconds=max_update_period
         )
         self.consumer = Consumer(
             self.dispatcher.output_queue,
-            output_functor
+            self._show_result,
+            self._handle_result
         )
+        if snapshot_store:
+            self._restore_snapshot()
 
     def turn_on(self):
+        self.turn_on_time = time.time()
         self.dispatcher.start()
         self.producer.start()
         self.consumer.start()
@@ -69,6 +176,9 @@ class RadiatorChannel(object):
     def no_signal(self):
         return self.consumer.no_data_from_the_queue
 
+    def waiting_for_first_result(self):
+        return self.consumer.last_result_time is None
+
     def do_update(self):
         return self.consumer.request_update
 
@@ -76,8 +186,93 @@ class RadiatorChannel(object):
         self.consumer.request_update = False
 
     def display_static(self):
-        x_offset = RRR(30) - 30
-        y_offset = RRR(30) - 30
-        self.static.scroll(x_offset, y_offset)
-        self.surface.blit(self.static, (0, 0))
-        self.surface.blit(self.overlay, (5, 5))
+        self.static_noise.blit_window(self.surface)
+        self.surface.blit(self._get_overlay(), (5, 5))
+        self._dirty_rects.append(self.surface.get_rect())
+        self._whole_surface_dirty = True
+
+    def refresh(self):
+        if not self.no_signal():
+            self.output_functor.refresh()
+
+    def repaint(self):
+        if self.no_signal():
+            self.display_static()
+        else:
+            self._whole_surface_dirty = True
+
+    def present(self):
+        dirty_rects, self._dirty_rects = self._dirty_rects, []
+        if not self.no_signal():
+            dirty_rects.extend(
+                self.output_functor.present(self.surface, self._whole_surface_dirty)
+            )
+            self._whole_surface_dirty = False
+            stale_overlay = self.stale_overlay
+            if stale_overlay and dirty_rects:
+                dirty_rects.append(self._draw_stale_overlay(stale_overlay))
+        offset = self.surface.get_abs_offset()
+        return [x.move(offset) for x in dirty_rects]
+
+    def get_statistics(self):
+        now = time.time()
+        render_time = self.output_functor.last_render_time
+        last_update_time = self.consumer.last_update_time
+        return ChannelStatistics(
+            fetch_latency=self.producer.last_fetch_latency,
+            render_time=None if render_time is None else render_time * 1000,
+            queue_depth=self.dispatcher.queue_depth(),
+            last_update_age=None if last_update_time is None else now - last_update_time,
+            skipped_ticks=self.producer.skipped_ticks,
+            timed_out_results=self.consumer.timed_out_results,
+            changed_results=self.consumer.changed_results,
+            unchanged_results=self.consumer.unchanged_results,
+            update_period=self.producer.get_period()
+        )
+
+    def _get_overlay(self):
+        if not self.waiting_for_first_result():
+            return self.overlay
+        elapsed_time = int(time.time() - self.turn_on_time) if self.turn_on_time else 0
+        if self._loading_overlay[0] != elapsed_time:
+            self._loading_overlay = (
+                elapsed_time,
+                create_loading_overlay(self.config, self.name, elapsed_time)
+            )
+        return self._loading_overlay[1]
+
+    def _restore_snapshot(self):
+        snapshot = self.snapshot_store.get(self.name)
+        if not snapshot:
+            return
+        update_time, result = snapshot
+        result = unpack_result(result)
+        if not result:
+            return
+        LOGGER.debug("Show stale content of %s from %s", self.name, time.ctime(update_time))
+        self.output_functor(result)
+        self.stale_overlay = create_stale_overlay(self.config, update_time)
+        self.consumer.no_data_from_the_queue = False
+        self.consumer.last_update_time = update_time
+
+    def _draw_stale_overlay(self, stale_overlay):
+        overlay_rect = stale_overlay.get_rect(topright=(self.surface.get_width() - 5, 5))
+        self.surface.blit(stale_overlay, overlay_rect)
+        return overlay_rect
+
+    def _show_result(self, result):
+        self.output_functor(result)
+        if self.snapshot_store:
+            self.snapshot_store.update(self.name, result)
+
+    def _handle_result(self, changed, timed_out):
+        if self.consumer.changed_results + self.consumer.unchanged_results == 1:
+            LOGGER.info("Time to first content of %s: %.2f s",
+                        self.name, self.consumer.last_result_time - self.turn_on_time)
+        if self.stale_overlay:
+            self.stale_overlay = None
+            self._whole_surface_dirty = True
+
+        self.producer.fetch_completed(changed or self.output_functor.has_countdowns(), timed_out)
+        if changed:
+            post_content_update_event(self.name)
@@ -0,0 +1,94 @@
+import logging
+import os
+import pickle
+import threading
+import time
+
+from pyradiator.wire_format import pack_result
+
+
+LOGGER = logging.getLogger(__name__)
+SNAPSHOT_VERSION = 1
+SNAPSHOT_WRITE_INTERVAL = 5
+
+
+def create_snapshot_store(config):
+    if not config.snapshot_path:
+        return None
+    snapshot_store = SnapshotStore(os.path.expanduser(config.snapshot_path))
+    snapshot_store.load()
+    return snapshot_store
+
+
+class SnapshotStore(object):
+
+    def __init__(self, snapshot_path):
+        self.snapshot_path = snapshot_path
+        self._snapshots = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._updated = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._loop)
+
+    def load(self):
+        try:
+            with open(self.snapshot_path, "rb") as snapshot_file:
+                snapshot = pickle.load(snapshot_file)
+        except FileNotFoundError:
+            return
+        except Exception:
+            LOGGER.exception("Snapshot %s could not be loaded", self.snapshot_path)
+            return
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            LOGGER.warning("Snapshot %s has unknown version, ignored", self.snapshot_path)
+            return
+        self._snapshots = snapshot["channels"]
+        LOGGER.debug("Snapshot of %d channels loaded from %s",
+                     len(self._snapshots), self.snapshot_path)
+
+    def get(self, channel_name):
+        with self._lock:
+            return self._snapshots.get(channel_name)
+
+    def update(self, channel_name, result):
+        with self._lock:
+            self._snapshots[channel_name] = (time.time(), pack_result(result))
+            self._dirty = True
+        self._updated.set()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._updated.set()
+        self._thread.join()
+        self._write()
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            self._updated.wait()
+            self._updated.clear()
+            self._write()
+            self._stopped.wait(SNAPSHOT_WRITE_INTERVAL)
+
+    def _write(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = {"version": SNAPSHOT_VERSION, "channels": dict(self._snapshots)}
+            self._dirty = False
+        snapshot_directory = os.path.dirname(self.snapshot_path)
+        temporary_path = "{}.{}.tmp".format(self.snapshot_path, os.getpid())
+        try:
+            if snapshot_directory:
+                os.makedirs(snapshot_directory, exist_ok=True)
+            with open(temporary_path, "wb") as snapshot_file:
+                pickle.dump(snapshot, snapshot_file, pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, self.snapshot_path)
+        except OSError:
+            LOGGER.exception("Snapshot %s could not be written", self.snapshot_path)
+        else:
+            LOGGER.debug("Snapshot of %d channels written to %s",
+                         len(snapshot["channels"]), self.snapshot_path)
@@ -0,0 +1,239 @@
+import argparse
+import itertools
+import json
+import logging
+import os
+import pickle
+import platform
+import timeit
+
+import pygame
+
+from pyradiator import common
+from pyradiator.command_line_args import config_dict_to_namespace
+from pyradiator.command_line_args import get_complete_factory_settings
+from pyradiator.common import ColoredString
+from pyradiator.common import PrintText
+from pyradiator.common import create_font
+from pyradiator.dispatcher import Dispatcher
+from pyradiator.radiator import create_sub_surfaces
+from pyradiator.radiator_channel import RadiatorChannel
+from pyradiator.radiator_channel import StaticNoiseAtlas
+from pyradiator.radiator_channel import create_static_surface
+from pyradiator.wire_format import pack_text
+from pyradiator.wire_format import unpack_text
+
+
+RESOLUTIONS = {
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160),
+}
+PRINT_TEXT_LINE_COUNTS = [10, 100, 1000]
+PRINT_TEXT_LINE_WIDTHS = [40, 160]
+JENKINS_JOB_COUNTS = [10, 100]
+JENKINS_STATUSES = ["SUCCESS", "FAILURE", "UNSTABLE", "BUILDING"]
+
+
+def create_config(resolution):
+    config = config_dict_to_namespace(get_complete_factory_settings())
+    config.window_width, config.window_height = resolution
+    config.number_of_left_rows = 2
+    config.number_of_right_rows = 2
+    return config
+
+
+def create_lines(line_count, line_width, generation=0):
+    return [
+        [
+            ColoredString("{:>6} ".format(i), (255, 255, 0)),
+            ColoredString("{}".format(generation % 10) * (line_width - 14)),
+            ColoredString(" {:>6}".format(i * generation), (0, 255, 0)),
+        ]
+        for i in range(line_count)
+    ]
+
+
+def create_job_info_list(job_count):
+    return [
+        (
+            ColoredString("job-{:04d}".format(i), (0, 255, 0)),
+            ColoredString(JENKINS_STATUSES[i % len(JENKINS_STATUSES)], (255, 255, 255)),
+            ColoredString("00:{:02}:00,  50%".format(i % 60), (255, 255, 255)),
+        )
+        for i in range(job_count)
+    ]
+
+
+class GeneratedContent(object):
+
+    def __init__(self, line_count, line_width, generation):
+        self.line_count = line_count
+        self.line_width = line_width
+        self.generation = generation
+
+    def __call__(self):
+        return create_lines(self.line_count, self.line_width, self.generation)
+
+
+class Benchmark(object):
+
+    def __init__(self, repeat, number):
+        self.repeat = repeat
+        self.number = number
+        self.results = {}
+
+    def __call__(self, name, statement, setup=None, number=None):
+        number = number if number else self.number
+        timer = timeit.Timer(statement, setup if setup else "pass")
+        timings = [x / number for x in timer.repeat(self.repeat, number)]
+        self.results[name] = {
+            "number": number,
+            "repeat": self.repeat,
+            "best": min(timings),
+            "mean": sum(timings) / len(timings),
+        }
+        print("{:<40} {:>12.3f} ms".format(name, min(timings) * 1000))
+
+
+def benchmark_print_text(benchmark, main_surface, config):
+    surface = create_sub_surfaces(config, main_surface)[0]
+    font = create_font(config)
+    for line_count in PRINT_TEXT_LINE_COUNTS:
+        for line_width in PRINT_TEXT_LINE_WIDTHS:
+            name = "print_text.{}x{}".format(line_count, line_width)
+            lines = [create_lines(line_count, line_width, x) for x in range(2)]
+            alternating_lines = itertools.cycle(lines)
+            print_text = PrintText(config, pygame.Surface(surface.get_size()), (0, 0), font)
+            benchmark(name + ".changed", lambda: print_text(next(alternating_lines)))
+            benchmark(name + ".unchanged", lambda: print_text(lines[0]))
+
+
+def benchmark_static_surface(benchmark, config):
+    for name, resolution in sorted(RESOLUTIONS.items()):
+        benchmark(
+            "create_static_surface.{}".format(name),
+            lambda: create_static_surface(config, resolution),
+            number=1
+        )
+
+
+def benchmark_display_static(benchmark, main_surface, config):
+    subsurfaces = create_sub_surfaces(config, main_surface)
+    channel = RadiatorChannel(
+        config=config,
+        name="benchmark",
+        surface=subsurfaces[0],
+        static_noise=StaticNoiseAtlas(config, subsurfaces),
+        input_functor=None,
+        output_functor=None,
+        update_period=1
+    )
+    benchmark("display_static", channel.display_static)
+
+
+def benchmark_dispatcher_round_trip(benchmark):
+    for line_count in PRINT_TEXT_LINE_COUNTS:
+        dispatcher = Dispatcher()
+        dispatcher.start()
+        contents = [GeneratedContent(line_count, 80, x) for x in range(2)]
+        alternating_contents = itertools.cycle(contents)
+
+        def round_trip(content):
+            dispatcher.input_queue.put(content)
+            dispatcher.output_queue.get()
+
+        benchmark(
+            "dispatcher_round_trip.{}".format(line_count),
+            lambda: round_trip(next(alternating_contents))
+        )
+        benchmark(
+            "dispatcher_round_trip.unchanged.{}".format(line_count),
+            lambda: round_trip(contents[0])
+        )
+        dispatcher.stop()
+
+
+def benchmark_wire_format(benchmark):
+    for line_count in PRINT_TEXT_LINE_COUNTS:
+        lines = create_lines(line_count, PRINT_TEXT_LINE_WIDTHS[0])
+        payloads = {"raw": lines, "packed": pack_text(lines)}
+        for payload_name, payload in sorted(payloads.items()):
+            name = "wire_format.pickle.{}.{}".format(payload_name, line_count)
+            benchmark(name, lambda: pickle.dumps(payload, pickle.HIGHEST_PROTOCOL))
+            benchmark.results[name]["bytes"] = len(pickle.dumps(payload, pickle.HIGHEST_PROTOCOL))
+        benchmark(
+            "wire_format.round_trip.{}".format(line_count),
+            lambda: unpack_text(pickle.loads(pickle.dumps(pack_text(lines))))
+        )
+
+
+def benchmark_jenkins_table(benchmark):
+    # The Jenkins content provider asks for credentials when it is imported.
+    common.get_authenticator = lambda: None
+    from pyradiator.content_providers import ask_jenkins_jobs_status
+    for job_count in JENKINS_JOB_COUNTS:
+        job_info_list = create_job_info_list(job_count)
+        ask_jenkins_jobs_status.get_job_info = lambda url, name: job_info_list[int(name)]
+        provider = ask_jenkins_jobs_status.AskJenkinsJobsStatus({
+            "url": "",
+            "job_names": [str(x) for x in range(job_count)],
+            "bulk_query": False
+        })
+        benchmark("jenkins_table.{}".format(job_count), provider)
+
+
+def get_environment():
+    return {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "video_driver": pygame.display.get_driver(),
+    }
+
+
+def compare_with_baseline(results, baseline_file_name):
+    with open(baseline_file_name, "r") as baseline_file:
+        baseline = json.load(baseline_file)["results"]
+    for name, result in results.items():
+        if name in baseline:
+            result["speedup"] = baseline[name]["best"] / result["best"]
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="PyRadiator benchmarks.")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare with.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=10)
+    return parser.parse_args()
+
+
+def main():
+    arguments = parse_arguments()
+    logging.getLogger().setLevel(logging.WARNING)
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    pygame.font.init()
+    config = create_config(RESOLUTIONS["1080p"])
+    main_surface = pygame.display.set_mode((config.window_width, config.window_height))
+    benchmark = Benchmark(arguments.repeat, arguments.number)
+
+    benchmark_print_text(benchmark, main_surface, config)
+    benchmark_static_surface(benchmark, config)
+    benchmark_display_static(benchmark, main_surface, config)
+    benchmark_dispatcher_round_trip(benchmark)
+    benchmark_wire_format(benchmark)
+    benchmark_jenkins_table(benchmark)
+
+    if arguments.baseline:
+        compare_with_baseline(benchmark.results, arguments.baseline)
+    report = {"environment": get_environment(), "results": benchmark.results}
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            json.dump(report, output_file, indent=4, sort_keys=True)
+    else:
+        print(json.dumps(report, indent=4, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
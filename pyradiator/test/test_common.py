@@ -0,0 +1,63 @@
+import random
+import unittest
+
+from pyradiator.common import Table
+
+
+try:
+    import prettytable
+except ImportError:
+    prettytable = None
+
+
+RANDOM_TABLE_COUNT = 2000
+
+
+class TestTable(unittest.TestCase):
+
+    def test_headers_follow_column_alignment(self):
+        table = Table(["Name", "St", "E.T.A."], ["l", "c", "r"])
+        table.add_row(["abc", "BUILDING", "1"])
+        table.add_row(["a", "OK", "12345"])
+        self.assertEqual(str(table), "\n".join([
+            "+------+----------+--------+",
+            "| Name |    St    | E.T.A. |",
+            "+------+----------+--------+",
+            "| abc  | BUILDING |      1 |",
+            "| a    |    OK    |  12345 |",
+            "+------+----------+--------+",
+        ]))
+
+    def test_odd_padding_of_centered_cells(self):
+        table = Table(["Odd", "Even"])
+        table.add_row(["abcdef", "abcdefg"])
+        table.add_row(["ab", "a"])
+        self.assertEqual(str(table), "\n".join([
+            "+--------+---------+",
+            "|  Odd   |   Even  |",
+            "+--------+---------+",
+            "| abcdef | abcdefg |",
+            "|   ab   |    a    |",
+            "+--------+---------+",
+        ]))
+
+    @unittest.skipIf(prettytable is None, "prettytable is not installed")
+    def test_same_as_prettytable(self):
+        generator = random.Random(0)
+        for _ in range(RANDOM_TABLE_COUNT):
+            column_count = generator.randint(1, 4)
+            header = ["h{}{}".format(x, "x" * generator.randint(0, 6)) for x in range(column_count)]
+            align = [generator.choice("lcr") for _ in header]
+            table = Table(header, align)
+            expected = prettytable.PrettyTable(header)
+            for field_name, field_align in zip(header, align):
+                expected.align[field_name] = field_align
+            for _ in range(generator.randint(0, 4)):
+                row = ["y" * generator.randint(0, 9) for _ in header]
+                table.add_row(row)
+                expected.add_row(row)
+            self.assertEqual(str(table), expected.get_string())
+
+
+if __name__ == "__main__":
+    unittest.main()
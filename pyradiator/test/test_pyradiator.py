@@ -33,7 +33,8 @@ def main():
                         dispatcher.input_queue,
                         Multiply(randrange(3, 6), randrange(7, 12)))
     consumer = Consumer(dispatcher.output_queue,
-                        print_tabbed)
+                        print_tabbed,
+                        producer.fetch_completed)
 
     def start_stuff():
         dispatcher.start()
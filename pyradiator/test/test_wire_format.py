@@ -0,0 +1,108 @@
+import pickle
+import unittest
+
+from pyradiator.common import ColoredString
+from pyradiator.common import CountdownString
+from pyradiator.wire_format import MAX_SHORT
+from pyradiator.wire_format import PackedText
+from pyradiator.wire_format import get_fingerprint
+from pyradiator.wire_format import pack_result
+from pyradiator.wire_format import unpack_result
+
+
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+WHITE = (255, 255, 255)
+
+
+def to_tuples(lines):
+    return [
+        [(x.__class__.__name__, x.text, x.color) for x in line]
+        for line in lines
+    ]
+
+
+def round_trip(lines):
+    return unpack_result(pickle.loads(pickle.dumps(pack_result(lines))))
+
+
+class TestPackText(unittest.TestCase):
+
+    def test_empty_result(self):
+        packed = pack_result([])
+        self.assertIsInstance(packed, PackedText)
+        self.assertEqual(len(packed), 0)
+        self.assertEqual(round_trip([]), [])
+
+    def test_palette_keeps_first_seen_order_of_mixed_colors(self):
+        lines = [
+            [ColoredString("a", GREEN), ColoredString("b", RED)],
+            [ColoredString("c", WHITE), ColoredString("d", GREEN)],
+            [],
+            [ColoredString("e", RED), ColoredString("", WHITE)],
+        ]
+        packed = pack_result(lines)
+        self.assertEqual(packed.palette, (GREEN, RED, WHITE))
+        self.assertEqual(list(packed.color_indexes), [0, 1, 2, 0, 1, 2])
+        self.assertEqual(list(packed.part_counts), [2, 2, 0, 2])
+        self.assertEqual(to_tuples(round_trip(lines)), to_tuples(lines))
+
+    def test_short_arrays_for_small_values(self):
+        packed = pack_result([[ColoredString("x" * MAX_SHORT)]])
+        self.assertEqual(packed.text_lengths.typecode, "H")
+        self.assertEqual(packed.part_counts.typecode, "H")
+
+    def test_int_arrays_for_values_above_max_short(self):
+        lines = [[ColoredString("x" * (MAX_SHORT + 1)), ColoredString("y", RED)]]
+        packed = pack_result(lines)
+        self.assertEqual(packed.text_lengths.typecode, "I")
+        self.assertEqual(packed.color_indexes.typecode, "H")
+        self.assertEqual(to_tuples(round_trip(lines)), to_tuples(lines))
+
+    def test_countdown_cells(self):
+        countdown = CountdownString(1000.0, 60.0, RED, width=16)
+        lines = [[ColoredString("Job", WHITE), countdown, ColoredString("|", WHITE)]]
+        packed = pack_result(lines)
+        self.assertEqual(packed.countdowns, ((1, 1000.0, 60.0),))
+        self.assertNotIn(countdown.text, packed.text)
+        unpacked = round_trip(lines)
+        self.assertIsInstance(unpacked[0][1], CountdownString)
+        self.assertEqual(
+            (unpacked[0][1].start_time, unpacked[0][1].duration, unpacked[0][1].width),
+            (1000.0, 60.0, 16)
+        )
+        self.assertEqual(to_tuples(unpacked), to_tuples(lines))
+
+    def test_non_text_results_pass_through(self):
+        for result in ("text", None, {"a": 1}, [1, 2]):
+            self.assertEqual(round_trip(result), result)
+
+
+class TestGetFingerprint(unittest.TestCase):
+
+    @staticmethod
+    def create_lines(text="a", color=RED, start_time=1000.0):
+        return [
+            [ColoredString(text, color), ColoredString("b", GREEN)],
+            [CountdownString(start_time, 60.0, WHITE, width=16)],
+        ]
+
+    def test_stable_for_identical_content(self):
+        self.assertEqual(
+            get_fingerprint(self.create_lines()),
+            get_fingerprint(self.create_lines())
+        )
+
+    def test_changes_when_content_changes(self):
+        fingerprint = get_fingerprint(self.create_lines())
+        self.assertNotEqual(fingerprint, get_fingerprint(self.create_lines(text="c")))
+        self.assertNotEqual(fingerprint, get_fingerprint(self.create_lines(color=WHITE)))
+        self.assertNotEqual(fingerprint, get_fingerprint(self.create_lines(start_time=1001.0)))
+
+    def test_non_text_results(self):
+        self.assertEqual(get_fingerprint({"a": 1}), get_fingerprint({"a": 1}))
+        self.assertNotEqual(get_fingerprint({"a": 1}), get_fingerprint({"a": 2}))
+
+
+if __name__ == "__main__":
+    unittest.main()
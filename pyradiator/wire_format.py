@@ -0,0 +1,130 @@
+import array
+import hashlib
+import pickle
+
+from pyradiator.common import ColoredString
+from pyradiator.common import CountdownString
+
+
+MAX_SHORT = 0xFFFF
+STOP_SENTINEL = "STOP"
+TIMEOUT_SENTINEL = "TIMEOUT"
+UNCHANGED_SENTINEL = "UNCHANGED"
+
+
+class PackedText(object):
+
+    __slots__ = ("palette", "part_counts", "color_indexes", "text_lengths", "text", "countdowns")
+
+    def __init__(self, palette, part_counts, color_indexes, text_lengths, text, countdowns=()):
+        self.palette = palette
+        self.part_counts = part_counts
+        self.color_indexes = color_indexes
+        self.text_lengths = text_lengths
+        self.text = text
+        self.countdowns = countdowns
+
+    def __reduce__(self):
+        return (self.__class__, (
+            self.palette,
+            self.part_counts,
+            self.color_indexes,
+            self.text_lengths,
+            self.text,
+            self.countdowns
+        ))
+
+    def __len__(self):
+        return len(self.part_counts)
+
+
+def is_text(result):
+    return isinstance(result, list) and all(isinstance(x, list) for x in result)
+
+
+def create_array(values):
+    return array.array("H" if max(values, default=0) <= MAX_SHORT else "I", values)
+
+
+def pack_text(lines):
+    palette = []
+    color_index_map = {}
+    part_counts = []
+    color_indexes = []
+    text_lengths = []
+    texts = []
+    countdowns = []
+    for line in lines:
+        part_counts.append(len(line))
+        for line_part in line:
+            color_index = color_index_map.get(line_part.color)
+            if color_index is None:
+                color_index = color_index_map[line_part.color] = len(palette)
+                palette.append(line_part.color)
+            color_indexes.append(color_index)
+            text_lengths.append(len(line_part.text))
+            if isinstance(line_part, CountdownString):
+                countdowns.append(
+                    (len(texts), line_part.start_time, line_part.duration)
+                )
+                texts.append(" " * len(line_part.text))
+            else:
+                texts.append(line_part.text)
+    return PackedText(
+        tuple(palette),
+        create_array(part_counts),
+        create_array(color_indexes),
+        create_array(text_lengths),
+        "".join(texts),
+        tuple(countdowns)
+    )
+
+
+def unpack_text(packed_text):
+    lines = []
+    text = packed_text.text
+    colors = packed_text.palette
+    color_indexes = iter(packed_text.color_indexes)
+    text_lengths = iter(packed_text.text_lengths)
+    countdowns = {x[0]: x[1:] for x in packed_text.countdowns}
+    text_position = 0
+    part_index = 0
+    for part_count in packed_text.part_counts:
+        line = []
+        for _ in range(part_count):
+            text_end = text_position + next(text_lengths)
+            if part_index in countdowns:
+                line.append(CountdownString(
+                    *countdowns[part_index],
+                    color=colors[next(color_indexes)],
+                    width=text_end - text_position
+                ))
+            else:
+                line.append(
+                    ColoredString(text[text_position:text_end], colors[next(color_indexes)])
+                )
+            text_position = text_end
+            part_index += 1
+        lines.append(line)
+    return lines
+
+
+def get_fingerprint(result):
+    result = pack_result(result)
+    if not isinstance(result, PackedText):
+        return hashlib.sha1(pickle.dumps(result, pickle.HIGHEST_PROTOCOL)).digest()
+    fingerprint = hashlib.sha1(repr(result.palette).encode())
+    fingerprint.update(result.part_counts.tobytes())
+    fingerprint.update(result.color_indexes.tobytes())
+    fingerprint.update(result.text_lengths.tobytes())
+    fingerprint.update(result.text.encode("utf-8", "surrogatepass"))
+    fingerprint.update(repr(result.countdowns).encode())
+    return fingerprint.digest()
+
+
+def pack_result(result):
+    return pack_text(result) if is_text(result) else result
+
+
+def unpack_result(result):
+    return unpack_text(result) if isinstance(result, PackedText) else result
@@ -19,7 +19,6 @@ def get_date():
 PACKAGE_NAME = "pyradiator"
 PACKAGE_VERSION = "0.1.{}".format(get_date())
 PACKAGE_REQUIREMENTS = [
-    "prettytable",
     "pygame",
     "requests",
 ]